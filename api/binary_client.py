@@ -0,0 +1,75 @@
+# api/binary_client.py
+
+import socket
+
+from api.binary_protocol import LENGTH, HEADER, MAX_RECORDS, encode_records, encode_frame, decode_results
+from src.config import BINARY_HOST, BINARY_PORT
+
+
+class BinaryClient:
+    """
+    Blocking client for api/binary_server.py.
+
+    `score_many` pipelines up to `window` frames before reading responses.
+    """
+
+    def __init__(self, unix_path: str = None, host: str = BINARY_HOST, port: int = BINARY_PORT):
+        if unix_path is not None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(unix_path)
+        else:
+            self._sock = socket.create_connection((host, port))
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._next_id = 0
+
+    def close(self):
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def score(self, transactions: list):
+        """
+        Scores and fraud flags for one batch of transaction dicts.
+        """
+        return self.score_many([transactions])[0]
+
+    def score_many(self, batches: list, window: int = 64) -> list:
+        results = []
+        sent = 0
+        while sent < len(batches) or len(results) < len(batches):
+            chunk = []
+            while sent < len(batches) and sent - len(results) < window:
+                chunk.append(self._frame(batches[sent]))
+                sent += 1
+            if chunk:
+                self._sock.sendall(b"".join(chunk))
+            results.append(self._read_response())
+        return results
+
+    def _frame(self, transactions: list) -> bytes:
+        if len(transactions) > MAX_RECORDS:
+            raise ValueError(f"At most {MAX_RECORDS} records per frame")
+        self._next_id = (self._next_id + 1) % 2 ** 32
+        return encode_frame(self._next_id, len(transactions), encode_records(transactions))
+
+    def _read_response(self):
+        (length,) = LENGTH.unpack(self._recv_exact(LENGTH.size))
+        frame = self._recv_exact(length)
+        _, count = HEADER.unpack_from(frame)
+        if count == 0:
+            raise RuntimeError("Server failed to score request")
+        return decode_results(frame[HEADER.size:], count)
+
+    def _recv_exact(self, n: int) -> bytes:
+        chunks = []
+        while n:
+            chunk = self._sock.recv(n)
+            if not chunk:
+                raise ConnectionError("Server closed the connection")
+            chunks.append(chunk)
+            n -= len(chunk)
+        return b"".join(chunks)
@@ -0,0 +1,69 @@
+# api/binary_protocol.py
+#
+# Fixed-layout binary records for the socket scoring server.
+#
+# Frame:    uint32 length | uint32 request_id | uint16 count | count x record
+# Request:  one RECORD_DTYPE record per transaction, fields in FEATURES
+#           order without the interaction features (computed server-side)
+# Response: one RESULT_DTYPE record per transaction, in request order
+#
+# All integers are little-endian; strings are ASCII, null-padded.
+
+import struct
+
+import numpy as np
+import pandas as pd
+
+from src.config import FEATURES, NUM_COLS, BIN_COLS, CAT_COLS
+from src.features import INTERACTION_FEATURES
+
+FIELDS = [c for c in FEATURES if c not in INTERACTION_FEATURES]
+
+STRING_SIZE = 16
+
+
+def _field_dtype(c: str) -> str:
+    if c in NUM_COLS:
+        return "<f8"
+    if c in BIN_COLS:
+        return "u1"
+    if c == "month":
+        return "<i4"
+    return f"S{STRING_SIZE}"
+
+
+RECORD_DTYPE = np.dtype([(c, _field_dtype(c)) for c in FIELDS])
+RESULT_DTYPE = np.dtype([("risk_score", "<f8"), ("fraud_flag", "u1")])
+
+LENGTH = struct.Struct("<I")
+HEADER = struct.Struct("<IH")
+MAX_RECORDS = 65535
+MAX_FRAME = HEADER.size + MAX_RECORDS * RECORD_DTYPE.itemsize
+
+
+def encode_records(transactions: list) -> bytes:
+    records = np.zeros(len(transactions), dtype=RECORD_DTYPE)
+    for c in FIELDS:
+        values = [t[c] for t in transactions]
+        if RECORD_DTYPE[c].kind == "S":
+            values = [str(v).encode("ascii") for v in values]
+        records[c] = values
+    return records.tobytes()
+
+
+def decode_records(payload: bytes, count: int) -> pd.DataFrame:
+    records = np.frombuffer(payload, dtype=RECORD_DTYPE, count=count)
+    df = pd.DataFrame({c: records[c] for c in FIELDS})
+    for c in CAT_COLS:
+        if RECORD_DTYPE[c].kind == "S":
+            df[c] = np.char.decode(records[c], "ascii")
+    return df
+
+
+def encode_frame(request_id: int, count: int, body: bytes) -> bytes:
+    header = HEADER.pack(request_id, count)
+    return LENGTH.pack(len(header) + len(body)) + header + body
+
+
+def decode_results(body: bytes, count: int) -> np.ndarray:
+    return np.frombuffer(body, dtype=RESULT_DTYPE, count=count)
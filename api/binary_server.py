@@ -0,0 +1,202 @@
+# api/binary_server.py
+#
+# Optional length-prefixed binary scoring server for same-host callers.
+# Run from the project root:
+#   python -m api.binary_server --unix /tmp/shieldbank.sock
+#   python -m api.binary_server --host 127.0.0.1 --port 9000
+
+import argparse
+import asyncio
+import os
+
+import numpy as np
+import pandas as pd
+
+from api.binary_protocol import (
+    LENGTH,
+    HEADER,
+    MAX_FRAME,
+    RECORD_DTYPE,
+    RESULT_DTYPE,
+    decode_records,
+    encode_frame,
+)
+from src.audit import AuditLogFull, AuditSink
+from src.config import (
+    AUDIT_DIR,
+    BINARY_HOST,
+    BINARY_PORT,
+    BINARY_MAX_BATCH,
+    BINARY_BATCH_WAIT_MS,
+    FRAUD_THRESHOLD,
+    MODEL_VERSION,
+)
+from src.inference import predict_batch
+
+
+class BinaryScoringServer:
+    """
+    Accepts pipelined frames on any number of connections and scores all
+    frames waiting at the same time with one model call. Responses on a
+    connection are written in the order its requests arrived.
+
+    Each request is decoded and audited on its own, so a malformed request
+    or a saturated audit log fails that request only, never the other
+    frames coalesced with it.
+    """
+
+    def __init__(self, audit_sink: AuditSink, max_batch: int = BINARY_MAX_BATCH,
+                 batch_wait_ms: float = BINARY_BATCH_WAIT_MS):
+        self.audit_sink = audit_sink
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000
+        self._queue = asyncio.Queue()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        pending = asyncio.Queue()
+        sender = asyncio.create_task(self._send(writer, pending))
+        try:
+            while True:
+                (length,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+                # Refuse to buffer a frame no valid request can produce
+                if not HEADER.size <= length <= MAX_FRAME:
+                    break
+                frame = await reader.readexactly(length)
+                request_id, count = HEADER.unpack_from(frame)
+                body = frame[HEADER.size:]
+                if len(body) != count * RECORD_DTYPE.itemsize:
+                    break
+
+                done = loop.create_future()
+                await pending.put((request_id, count, done))
+                await self._queue.put((count, body, done))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            await pending.put(None)
+            await sender
+            writer.close()
+
+    async def _send(self, writer: asyncio.StreamWriter, pending: asyncio.Queue):
+        while True:
+            item = await pending.get()
+            if item is None:
+                return
+            request_id, count, done = item
+            try:
+                body = await done
+            except Exception:
+                # Zero results tell the client the request failed
+                count, body = 0, b""
+            writer.write(encode_frame(request_id, count, body))
+            if pending.empty():
+                await writer.drain()
+
+    async def batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            rows = items[0][0]
+            if self._queue.empty() and self.batch_wait > 0:
+                await asyncio.sleep(self.batch_wait)
+            while rows < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                items.append(item)
+                rows += item[0]
+
+            try:
+                bodies = await loop.run_in_executor(None, self._score, items)
+            except Exception as e:
+                for _, _, done in items:
+                    done.set_exception(e)
+                continue
+            for (_, _, done), body in zip(items, bodies):
+                if isinstance(body, Exception):
+                    done.set_exception(body)
+                else:
+                    done.set_result(body)
+
+    def _score(self, items: list) -> list:
+        """
+        Response body per request, or the exception that failed it.
+        """
+        bodies = [None] * len(items)
+        frames = []
+        for i, (count, body, _) in enumerate(items):
+            try:
+                frames.append((i, decode_records(body, count)))
+            except ValueError as e:
+                # e.g. non-ASCII category bytes
+                bodies[i] = e
+
+        if frames:
+            try:
+                scores = predict_batch(pd.concat([df for _, df in frames], ignore_index=True))
+                offsets = np.cumsum([0] + [len(df) for _, df in frames])
+                scores = [scores[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+            except Exception:
+                # Isolate the requests that cannot be scored instead of failing them all
+                scores = []
+                for _, df in frames:
+                    try:
+                        scores.append(predict_batch(df))
+                    except Exception as e:
+                        scores.append(e)
+
+            for (i, df), frame_scores in zip(frames, scores):
+                if isinstance(frame_scores, Exception):
+                    bodies[i] = frame_scores
+                    continue
+                try:
+                    bodies[i] = self._respond(df, frame_scores)
+                except AuditLogFull as e:
+                    bodies[i] = e
+        return bodies
+
+    def _respond(self, df: pd.DataFrame, scores: np.ndarray) -> bytes:
+        results = np.zeros(len(df), dtype=RESULT_DTYPE)
+        results["risk_score"] = scores
+        results["fraud_flag"] = scores >= FRAUD_THRESHOLD
+
+        # The whole frame is audited or none of it is
+        self.audit_sink.record_many(df.to_dict("records"), [
+            {
+                "model_version": MODEL_VERSION,
+                "risk_score": round(float(score), 4),
+                "fraud_flag": int(flag),
+                "stage": "full",
+            }
+            for score, flag in zip(scores, results["fraud_flag"])
+        ])
+        return results.tobytes()
+
+
+async def serve(unix_path: str = None, host: str = BINARY_HOST, port: int = BINARY_PORT):
+    audit_sink = AuditSink(AUDIT_DIR, prefix="audit-binary").start()
+    server = BinaryScoringServer(audit_sink)
+    batcher = asyncio.create_task(server.batcher())
+
+    if unix_path is not None:
+        if os.path.exists(unix_path):
+            os.remove(unix_path)
+        listener = await asyncio.start_unix_server(server.handle, path=unix_path)
+    else:
+        listener = await asyncio.start_server(server.handle, host=host, port=port)
+
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        batcher.cancel()
+        audit_sink.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Binary fraud scoring server")
+    parser.add_argument("--unix", help="Unix domain socket path (default: TCP)")
+    parser.add_argument("--host", default=BINARY_HOST)
+    parser.add_argument("--port", type=int, default=BINARY_PORT)
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.unix, args.host, args.port))
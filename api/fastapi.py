@@ -1,14 +1,118 @@
 
 
-from fastapi import FastAPI
-from pydantic import BaseModel
-from src.inference import predict_single
+import json
+import os
+import secrets
+import time
+from datetime import datetime
+from typing import List, Optional, Union
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic import BaseModel, Field
+from src.admission import AdmissionController
+from src.audit import AuditSink, AuditLogFull
+from src.config import (
+    ADMISSION_MAX_IN_FLIGHT,
+    ADMISSION_WORKERS,
+    ADMIN_TOKEN,
+    ADMIN_HEADER,
+    DEADLINE_HEADER,
+    AUDIT_DIR,
+    AUDIT_QUEUE_SIZE,
+    AUDIT_BATCH_SIZE,
+    AUDIT_FLUSH_SECONDS,
+    AUDIT_ROTATE_RECORDS,
+    HEATMAP_AMOUNT_COL,
+    MODEL_PATH,
+    MODEL_REGISTRY,
+    MODEL_CACHE_MB,
+    MODEL_WARMUP,
+    PROFILE_DIR,
+    PROFILE_MAX_SECONDS,
+    RING_IDENTIFIERS,
+    RING_TTL_SECONDS,
+    RING_MAX_APPLICATIONS,
+    RING_SAVE_SECONDS,
+    RING_INDEX_PATH,
+    REVIEW_QUEUE_CAPACITY,
+    REVIEW_TTL_SECONDS,
+    SHADOW_MODELS,
+    SHADOW_LOG_PATH,
+    SHADOW_SAMPLE_RATE,
+    TAIL_METRICS_PATH,
+    WHATIF_MAX_POINTS,
+)
+from src.drift import load_drift_monitor, reference_profile_path
+from src.heatmap import FraudHeatmap, load_amount_edges
+from src.backends import onnx_model_path
+from src.registry import ModelRegistry, ModelUnavailable, UnknownModel
+from src.profiling import Profiler, ProfilerBusy, model_footprint, process_memory
+from src.review import ReviewQueue
+from src.rings import RingIndex
+from src.shadow import load_shadow_scorer
+from src.whatif import whatif
+from src.inference import backend, model, planner, predict_batch, predict_single
 
 app = FastAPI(
     title="Bank Account Fraud Detection API",
     version="1.0"
 )
 
+fraud_heatmap = FraudHeatmap(load_amount_edges(reference_profile_path(MODEL_PATH)))
+# Early exits carry a partial score; monitors rescore them with the full model off the request path
+drift_monitor = load_drift_monitor(reference_profile_path(MODEL_PATH), rescore=predict_batch)
+shadow_scorer = load_shadow_scorer(SHADOW_MODELS, SHADOW_LOG_PATH, SHADOW_SAMPLE_RATE, rescore=predict_batch)
+audit_sink = AuditSink(
+    AUDIT_DIR,
+    max_queue=AUDIT_QUEUE_SIZE,
+    batch_size=AUDIT_BATCH_SIZE,
+    flush_seconds=AUDIT_FLUSH_SECONDS,
+    rotate_records=AUDIT_ROTATE_RECORDS
+).start()
+
+
+admission = AdmissionController(ADMISSION_MAX_IN_FLIGHT, ADMISSION_WORKERS)
+profiler = Profiler(PROFILE_DIR, PROFILE_MAX_SECONDS)
+model_registry = ModelRegistry(MODEL_REGISTRY, MODEL_CACHE_MB * 1024 * 1024, MODEL_WARMUP).warm_up()
+ring_index = (
+    RingIndex(RING_TTL_SECONDS, RING_MAX_APPLICATIONS)
+    .load(RING_INDEX_PATH)
+    .autosave(RING_INDEX_PATH, RING_SAVE_SECONDS)
+)
+review_queue = ReviewQueue(REVIEW_QUEUE_CAPACITY, REVIEW_TTL_SECONDS)
+
+
+@app.on_event("shutdown")
+def flush_state():
+    audit_sink.close()
+    ring_index.save(RING_INDEX_PATH)
+
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    # Runs on the event loop, so shed requests never reach the threadpool
+    path = request.url.path
+    if path != "/predict" and not (path.startswith("/models/") and path.endswith("/predict")):
+        return await call_next(request)
+
+    deadline = request.headers.get(DEADLINE_HEADER)
+    try:
+        deadline_ms = float(deadline) if deadline is not None else None
+    except ValueError:
+        return JSONResponse(status_code=400, content={"detail": f"Invalid {DEADLINE_HEADER} header"})
+
+    rejection = admission.try_admit(deadline_ms)
+    if rejection is not None:
+        status, reason = rejection
+        return JSONResponse(status_code=status, content={"detail": reason}, headers={"Retry-After": "1"})
+
+    try:
+        return await call_next(request)
+    finally:
+        admission.release()
+
+
 @app.get("/")
 def health():
     return {"status": "ok"}
@@ -44,9 +148,203 @@ class TransactionInput(BaseModel):
     source: str
     device_os: str
     month: int
+    # Optional identifiers for ring linkage; not model features
+    device_id: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
 
 
 @app.post("/predict")
 def predict(transaction: TransactionInput):
-    print(transaction.dict().keys())
-    return predict_single(transaction.dict())
+    with admission.timed():
+        return score_transaction(transaction.dict())
+
+
+@app.post("/models/{name}/predict")
+def predict_named(name: str, transaction: TransactionInput):
+    with admission.timed():
+        return score_transaction(transaction.dict(), name)
+
+
+def score_transaction(request: dict, model_name: str = None) -> dict:
+    # Ring identifiers are not model features; the audit keeps the full request
+    identifiers = {k: request.get(k) for k in RING_IDENTIFIERS}
+    payload = {k: v for k, v in request.items() if k not in identifiers}
+    if model_name is None:
+        result = predict_single(payload)
+    else:
+        try:
+            result = model_registry.predict(model_name, payload)
+        except UnknownModel as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ModelUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+
+    # Every decision must be audited; refuse rather than answer unlogged
+    try:
+        audit_sink.record(request, result)
+    except AuditLogFull:
+        raise HTTPException(status_code=503, detail="Audit log is saturated, retry later")
+
+    # Early exits are decided safe from a partial score, which is on another
+    # scale than full-model scores; it does not feed the queue or monitors
+    full_score = result["risk_score"] if result["stage"] == "full" else None
+    if full_score is not None:
+        review_queue.add(payload, result)
+    fraud_heatmap.update(
+        [datetime.now().hour],
+        [payload[HEATMAP_AMOUNT_COL]],
+        [result["fraud_flag"]]
+    )
+    # Drift reference and challengers belong to the default model
+    if model_name is None and drift_monitor is not None:
+        drift_monitor.observe(payload, full_score)
+    if model_name is None and shadow_scorer is not None:
+        shadow_scorer.observe(payload, full_score)
+
+    if any(v is not None for v in identifiers.values()):
+        result.update(ring_index.lookup(identifiers))
+        ring_index.add(identifiers, result["fraud_flag"])
+    return result
+
+
+class SweepInput(BaseModel):
+    feature: str
+    values: Optional[List[Union[float, str]]] = Field(None, max_length=WHATIF_MAX_POINTS)
+    min: Optional[float] = None
+    max: Optional[float] = None
+    steps: Optional[int] = Field(None, ge=2, le=WHATIF_MAX_POINTS)
+
+
+class WhatIfInput(BaseModel):
+    transaction: TransactionInput
+    sweeps: List[SweepInput]
+
+
+@app.post("/whatif")
+def whatif_surface(request: WhatIfInput):
+    # Analyst exploration: not audited and not counted in the heatmap or drift
+    transaction = request.transaction.dict()
+    for k in RING_IDENTIFIERS:
+        transaction.pop(k, None)
+    try:
+        return whatif(transaction, [s.dict() for s in request.sweeps])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/heatmap")
+def heatmap():
+    return fraud_heatmap.snapshot()
+
+
+@app.get("/drift")
+def drift():
+    if drift_monitor is None:
+        return {"status": "unavailable", "detail": "No reference profile stored with the model"}
+    report = drift_monitor.report()
+    if not report["thread_alive"]:
+        return {"status": "stopped", "detail": f"Drift worker stopped (last error: {report['last_error']})", **report}
+    return {"status": "ok", **report}
+
+
+@app.get("/shadow")
+def shadow():
+    if shadow_scorer is None:
+        return {"status": "unavailable", "detail": "No challenger models configured"}
+    report = shadow_scorer.report()
+    if not report["thread_alive"]:
+        return {"status": "stopped", "detail": f"Shadow worker stopped (last error: {report['last_error']})", **report}
+    return {"status": "ok", **report}
+
+
+@app.get("/audit")
+def audit():
+    return audit_sink.report()
+
+
+@app.get("/admission")
+def admission_stats():
+    return admission.report()
+
+
+@app.get("/models")
+def models():
+    return model_registry.report()
+
+
+@app.get("/rings")
+def rings():
+    return ring_index.report()
+
+
+@app.get("/review")
+def review(k: int = 20):
+    return review_queue.report(k)
+
+
+@app.post("/review/{review_id}/acknowledge")
+def acknowledge_review(review_id: int):
+    try:
+        return review_queue.acknowledge(review_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Not pending review (acknowledged, expired or evicted)")
+
+
+@app.get("/tailer")
+def tailer():
+    # Written by the api.tail_scorer daemon, which runs as its own process
+    if not os.path.exists(TAIL_METRICS_PATH):
+        return {"status": "unavailable", "detail": "Tailing scorer is not running"}
+    with open(TAIL_METRICS_PATH) as f:
+        metrics = json.load(f)
+    return {"status": "ok", "age_seconds": round(time.time() - os.path.getmtime(TAIL_METRICS_PATH), 1), **metrics}
+
+
+@app.get("/backends")
+def backends():
+    return {**backend.report(), "planner": planner.report()}
+
+
+def require_admin(request: Request):
+    # Admin endpoints do not exist unless SHIELDBANK_ADMIN_TOKEN is set
+    token = request.headers.get(ADMIN_HEADER, "")
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.post("/admin/profile/cpu", dependencies=[Depends(require_admin)])
+def profile_cpu(seconds: float = 10, interval_ms: float = 5):
+    try:
+        result = profiler.cpu(seconds, interval_ms)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**result, "download": f"/admin/profiles/{result['file']}"}
+
+
+@app.post("/admin/profile/memory", dependencies=[Depends(require_admin)])
+def profile_memory(seconds: float = 10, top: int = 20):
+    try:
+        result = profiler.memory(seconds, lambda: admission.admitted, top=top)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {**result, "download": f"/admin/profiles/{result['file']}"}
+
+
+@app.get("/admin/profiles/{name}", dependencies=[Depends(require_admin)])
+def download_profile(name: str):
+    path = profiler.file_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No such profile")
+    return FileResponse(path, filename=name, media_type="application/octet-stream")
+
+
+@app.get("/admin/memory", dependencies=[Depends(require_admin)])
+def memory_footprint():
+    return {
+        "process": process_memory(),
+        "model": model_footprint(model, MODEL_PATH, [onnx_model_path(MODEL_PATH)]),
+    }
@@ -0,0 +1,325 @@
+# api/tail_scorer.py
+#
+# Long-running scorer for append-only NDJSON files of transactions, one
+# /predict body per line. Run from the project root:
+#   python -m api.tail_scorer incoming/applications.ndjson [more.ndjson ...]
+
+import argparse
+import json
+import os
+import signal
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from src.audit import AuditSink
+from src.config import (
+    AUDIT_DIR,
+    FEATURES,
+    FRAUD_THRESHOLD,
+    MODEL_VERSION,
+    TAIL_OUTPUT_PATH,
+    TAIL_CHECKPOINT_PATH,
+    TAIL_METRICS_PATH,
+    TAIL_MAX_BATCH,
+    TAIL_POLL_SECONDS,
+)
+from src.features import INTERACTION_FEATURES
+from src.inference import predict_batch
+
+REQUIRED_FIELDS = [f for f in FEATURES if f not in INTERACTION_FEATURES]
+
+
+def write_atomic(path: str, data: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+class TailScorer:
+    """
+    Tails append-only NDJSON files and scores new complete lines in
+    micro-batches of up to `max_batch` rows, one model call per batch.
+
+    Results go to `output_path` keyed by source file and byte offset. After
+    every batch the output is fsynced, then a checkpoint of each source's
+    offset and the output length replaces the previous one atomically. On
+    start the output is truncated back to the checkpointed length, so a
+    batch interrupted by a crash is scored again once and nothing is skipped.
+    Audit records are sent only after their batch is committed, so a
+    replayed batch is not audited twice.
+    """
+
+    def __init__(self, sources: list, output_path: str = TAIL_OUTPUT_PATH,
+                 checkpoint_path: str = TAIL_CHECKPOINT_PATH, metrics_path: str = TAIL_METRICS_PATH,
+                 max_batch: int = TAIL_MAX_BATCH, poll_seconds: float = TAIL_POLL_SECONDS,
+                 audit_sink: AuditSink = None, rate_window: float = 60.0):
+        self.sources = list(sources)
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path
+        self.metrics_path = metrics_path
+        self.max_batch = max_batch
+        self.poll_seconds = poll_seconds
+        self.audit_sink = audit_sink
+        self.rate_window = rate_window
+
+        self.offsets = {path: 0 for path in self.sources}
+        self.inodes = {path: None for path in self.sources}
+        self.sizes = {path: 0 for path in self.sources}
+        self._behind_since = {}
+        self._next = 0
+        self._output = None
+        self._stop = False
+
+        self.started = time.monotonic()
+        self.records = 0
+        self.errors = 0
+        self.batches = 0
+        self.resets = 0
+        self.last_batch_ms = None
+        self._recent = deque()
+        self._published = 0.0
+
+    def recover(self):
+        """
+        Restore offsets from the checkpoint and drop output written after it.
+        """
+        output_bytes = 0
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            for path, state in checkpoint["sources"].items():
+                if path in self.offsets:
+                    self.offsets[path] = state["offset"]
+                    self.inodes[path] = state["inode"]
+            output_bytes = checkpoint["output_bytes"]
+
+        for path in (self.output_path, self.checkpoint_path):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        size = os.path.getsize(self.output_path) if os.path.exists(self.output_path) else 0
+        if size < output_bytes:
+            raise RuntimeError(f"{self.output_path} is shorter than its checkpoint ({size} < {output_bytes} bytes)")
+
+        self._output = open(self.output_path, "ab")
+        self._output.truncate(output_bytes)
+        self._output.seek(output_bytes)
+        return self
+
+    def _read(self) -> tuple:
+        """
+        Up to `max_batch` complete lines as (source, offset, line), taking
+        sources round-robin, and the offset each source would move to.
+        """
+        lines, ends = [], {}
+        now = time.monotonic()
+        order = self.sources[self._next:] + self.sources[:self._next]
+        self._next = (self._next + 1) % len(self.sources)
+
+        for path in order:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+
+            offset = self.offsets[path]
+            if stat.st_ino != self.inodes[path] or stat.st_size < offset:
+                # A replaced or truncated source is read from its start
+                if self.inodes[path] is not None:
+                    self.resets += 1
+                self.inodes[path] = stat.st_ino
+                offset = 0
+            self.sizes[path] = stat.st_size
+            if stat.st_size > offset:
+                self._behind_since.setdefault(path, now)
+
+            with open(path, "rb") as f:
+                f.seek(offset)
+                while len(lines) < self.max_batch:
+                    line = f.readline()
+                    # A line without its newline is still being written
+                    if not line.endswith(b"\n"):
+                        break
+                    if line.strip():
+                        lines.append((path, offset, line))
+                    offset += len(line)
+            ends[path] = offset
+
+        return lines, ends
+
+    def _score(self, lines: list) -> tuple:
+        """
+        Output entries for `lines` and the (record, result) audit pairs of
+        those scored.
+        """
+        entries, rows, audits = [], [], []
+        for path, offset, line in lines:
+            entry = {"source": path, "offset": offset, "scored_at": None}
+            try:
+                record = json.loads(line)
+                missing = [f for f in REQUIRED_FIELDS if f not in record]
+                if missing:
+                    entry["error"] = f"Missing fields: {', '.join(missing)}"
+                else:
+                    rows.append((entry, {f: record[f] for f in REQUIRED_FIELDS}))
+            except (ValueError, TypeError):
+                entry["error"] = "Invalid JSON object"
+            entries.append(entry)
+
+        if rows:
+            df = pd.DataFrame([record for _, record in rows])
+            try:
+                scores = list(predict_batch(df))
+            except Exception:
+                # Isolate the rows that cannot be scored instead of failing the batch
+                scores = []
+                for _, record in rows:
+                    try:
+                        scores.append(predict_batch(pd.DataFrame([record]))[0])
+                    except Exception as e:
+                        scores.append(e)
+
+            for (entry, record), score in zip(rows, scores):
+                if isinstance(score, Exception):
+                    entry["error"] = f"Scoring failed: {score}"
+                    continue
+                entry.update(
+                    model_version=MODEL_VERSION,
+                    risk_score=round(float(score), 4),
+                    fraud_flag=int(score >= FRAUD_THRESHOLD),
+                )
+                audits.append((record, entry))
+
+        scored_at = _now()
+        for entry in entries:
+            entry["scored_at"] = scored_at
+        return entries, audits
+
+    def _commit(self, entries: list, ends: dict):
+        if entries:
+            self._output.write("".join(json.dumps(e) + "\n" for e in entries).encode())
+            self._output.flush()
+            os.fsync(self._output.fileno())
+
+        self.offsets.update(ends)
+        write_atomic(self.checkpoint_path, {
+            "sources": {p: {"offset": self.offsets[p], "inode": self.inodes[p]} for p in self.sources},
+            "output_bytes": self._output.tell(),
+            "committed_at": _now(),
+        })
+
+        for path, offset in ends.items():
+            if offset >= self.sizes[path]:
+                self._behind_since.pop(path, None)
+
+    def step(self) -> int:
+        """
+        Score and commit one micro-batch. Returns the lines scored.
+        """
+        start = time.perf_counter()
+        lines, ends = self._read()
+        if not lines and all(self.offsets[p] == offset for p, offset in ends.items()):
+            for path in ends:
+                self._behind_since.pop(path, None)
+            return 0
+
+        entries, audits = self._score(lines)
+        self._commit(entries, ends)
+        if self.audit_sink is not None:
+            for record, entry in audits:
+                self.audit_sink.record(record, dict(entry, stage="full"))
+
+        if entries:
+            self.batches += 1
+            self.records += len(entries)
+            self.errors += sum(1 for e in entries if "error" in e)
+            self.last_batch_ms = round((time.perf_counter() - start) * 1000, 2)
+            self._recent.append((time.monotonic(), len(entries)))
+        return len(entries)
+
+    def run(self):
+        if self._output is None:
+            self.recover()
+        try:
+            while not self._stop:
+                scored = self.step()
+                self.publish()
+                if not scored:
+                    time.sleep(self.poll_seconds)
+        finally:
+            self.publish(force=True)
+            self._output.close()
+            self._output = None
+
+    def stop(self):
+        """
+        Finish the current batch and return from `run`.
+        """
+        self._stop = True
+
+    def publish(self, force: bool = False):
+        # At most once a second; the API serves this file at /tailer
+        if self.metrics_path is None or (not force and time.monotonic() - self._published < 1.0):
+            return
+        write_atomic(self.metrics_path, self.report())
+        self._published = time.monotonic()
+
+    def report(self) -> dict:
+        now = time.monotonic()
+        while self._recent and self._recent[0][0] < now - self.rate_window:
+            self._recent.popleft()
+        window = min(self.rate_window, now - self.started) or 1.0
+
+        sources = {
+            path: {
+                "offset": self.offsets[path],
+                "size": self.sizes[path],
+                "bytes_behind": max(0, self.sizes[path] - self.offsets[path]),
+                "lag_seconds": round(now - self._behind_since[path], 2) if path in self._behind_since else 0.0,
+            }
+            for path in self.sources
+        }
+        return {
+            "updated_at": _now(),
+            "uptime_seconds": round(now - self.started, 1),
+            "records": self.records,
+            "errors": self.errors,
+            "batches": self.batches,
+            "resets": self.resets,
+            "mean_batch": round(self.records / self.batches, 1) if self.batches else None,
+            "last_batch_ms": self.last_batch_ms,
+            "throughput_rps": round(sum(n for _, n in self._recent) / window, 1),
+            "bytes_behind": sum(s["bytes_behind"] for s in sources.values()),
+            "lag_seconds": max((s["lag_seconds"] for s in sources.values()), default=0.0),
+            "sources": sources,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tailing NDJSON fraud scorer")
+    parser.add_argument("sources", nargs="+", help="Append-only NDJSON files to tail")
+    parser.add_argument("--output", default=TAIL_OUTPUT_PATH)
+    parser.add_argument("--checkpoint", default=TAIL_CHECKPOINT_PATH)
+    parser.add_argument("--metrics", default=TAIL_METRICS_PATH)
+    parser.add_argument("--max-batch", type=int, default=TAIL_MAX_BATCH)
+    parser.add_argument("--poll-seconds", type=float, default=TAIL_POLL_SECONDS)
+    args = parser.parse_args()
+
+    audit_sink = AuditSink(AUDIT_DIR, prefix="audit-tail", put_timeout=None).start()
+    scorer = TailScorer(args.sources, args.output, args.checkpoint, args.metrics,
+                        args.max_batch, args.poll_seconds, audit_sink).recover()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: scorer.stop())
+    try:
+        scorer.run()
+    finally:
+        audit_sink.close()
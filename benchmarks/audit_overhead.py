@@ -0,0 +1,125 @@
+# benchmarks/audit_overhead.py
+#
+# p50/p99 of POST /predict through the app (uvicorn, admission middleware,
+# threadpool) without the audit sink, with it, and with the sink saturated
+# so every request takes the 503 back-pressure path.
+# Run from the project root: python -m benchmarks.audit_overhead
+
+import argparse
+import socket
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+import uvicorn
+
+from src.audit import AuditSink
+from src.config import AUDIT_QUEUE_SIZE, AUDIT_BATCH_SIZE, AUDIT_FLUSH_SECONDS, AUDIT_ROTATE_RECORDS
+
+SAMPLE = {
+    "income": 0.3, "customer_age": 40, "credit_risk_score": 150,
+    "proposed_credit_limit": 1500.0, "intended_balcon_amount": 10.0,
+    "session_length_in_minutes": 5.0, "days_since_request": 0.5,
+    "bank_months_count": 10, "zip_count_4w": 1000,
+    "velocity_6h": 4000.0, "velocity_24h": 4000.0, "velocity_4w": 4500.0,
+    "bank_branch_count_8w": 10, "device_distinct_emails_8w": 1,
+    "date_of_birth_distinct_emails_4w": 5,
+    "prev_address_months_count": -1, "current_address_months_count": 50,
+    "email_is_free": 1, "phone_home_valid": 0, "phone_mobile_valid": 1,
+    "has_other_cards": 0, "foreign_request": 1, "keep_alive_session": 0,
+    "employment_status": "CA", "housing_status": "BC", "payment_type": "AB",
+    "source": "INTERNET", "device_os": "windows", "month": 7,
+}
+
+
+class NullSink:
+    def record(self, transaction: dict, result: dict):
+        pass
+
+
+def start_server(app) -> tuple:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}/predict"
+
+
+def run(url: str, n: int, clients: int) -> tuple:
+    """
+    `n` requests from `clients` concurrent keep-alive connections; returns
+    (latencies ms, status codes).
+    """
+    latencies, statuses = [], []
+    lock = threading.Lock()
+
+    def client(count: int):
+        session = requests.Session()
+        mine = []
+        for _ in range(count):
+            start = time.perf_counter()
+            status = session.post(url, json=SAMPLE).status_code
+            mine.append(((time.perf_counter() - start) * 1000, status))
+        with lock:
+            for latency, status in mine:
+                latencies.append(latency)
+                statuses.append(status)
+
+    threads = [threading.Thread(target=client, args=(n // clients,)) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return np.array(latencies), np.array(statuses)
+
+
+def summary(name: str, latencies: np.ndarray, statuses: np.ndarray) -> str:
+    codes = ", ".join(f"{code}: {(statuses == code).sum()}" for code in np.unique(statuses))
+    return (f"{name:<15} p50={np.percentile(latencies, 50):7.3f}ms  "
+            f"p99={np.percentile(latencies, 99):7.3f}ms  ({codes})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", type=int, default=4000)
+    parser.add_argument("--clients", type=int, default=4)
+    args = parser.parse_args()
+
+    import api.fastapi as api
+
+    server, thread, url = start_server(api.app)
+    production_sink = api.audit_sink
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            api.audit_sink = NullSink()
+            run(url, 200, args.clients)
+            baseline = run(url, args.n, args.clients)
+
+            api.audit_sink = AuditSink(
+                tmp,
+                max_queue=AUDIT_QUEUE_SIZE,
+                batch_size=AUDIT_BATCH_SIZE,
+                flush_seconds=AUDIT_FLUSH_SECONDS,
+                rotate_records=AUDIT_ROTATE_RECORDS
+            ).start()
+            audited = run(url, args.n, args.clients)
+            api.audit_sink.close()
+
+            # A writer that never drains: each request waits `put_timeout`, then 503
+            api.audit_sink = AuditSink(tmp, max_queue=1)
+            saturated = run(url, min(args.n, 200), args.clients)
+        finally:
+            api.audit_sink = production_sink
+            server.should_exit = True
+            thread.join()
+
+    print(summary("without audit", *baseline))
+    print(summary("with audit", *audited))
+    print(summary("saturated", *saturated))
+    print(f"p99 overhead: {np.percentile(audited[0], 99) - np.percentile(baseline[0], 99):+.3f}ms")
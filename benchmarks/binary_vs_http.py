@@ -0,0 +1,44 @@
+# benchmarks/binary_vs_http.py
+#
+# Single-transaction throughput: HTTP /predict vs the binary socket server.
+# Start both servers first:
+#   make run_api
+#   python -m api.binary_server --unix /tmp/shieldbank.sock
+# then run from the project root: python -m benchmarks.binary_vs_http
+
+import argparse
+import time
+
+import requests
+
+from api.binary_client import BinaryClient
+from benchmarks.audit_overhead import SAMPLE
+
+
+def bench_http(url: str, n: int) -> float:
+    session = requests.Session()
+    start = time.perf_counter()
+    for _ in range(n):
+        session.post(url, json=SAMPLE).raise_for_status()
+    return n / (time.perf_counter() - start)
+
+
+def bench_binary(client: BinaryClient, n: int, window: int) -> float:
+    start = time.perf_counter()
+    client.score_many([[SAMPLE]] * n, window=window)
+    return n / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000/predict")
+    parser.add_argument("--unix", default="/tmp/shieldbank.sock")
+    parser.add_argument("-n", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"HTTP /predict            {bench_http(args.url, args.n):8.0f} req/s")
+    with BinaryClient(unix_path=args.unix) as client:
+        client.score([SAMPLE])
+        for window in (1, 16, 64):
+            rate = bench_binary(client, args.n, window)
+            print(f"binary, window={window:<3}      {rate:8.0f} req/s")
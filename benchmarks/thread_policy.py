@@ -0,0 +1,80 @@
+# benchmarks/thread_policy.py
+#
+# Mixed load: concurrent callers sending mostly single transactions with
+# occasional large batches, scored by the backend router with each
+# backend's default threading on the DataFrame vs through the execution
+# planner in src/inference.py.
+# Run from the project root: python -m benchmarks.thread_policy
+
+import argparse
+import random
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.config import FEATURES
+from src.features import add_interaction_features
+from src.inference import backend, model, planner, score_full
+from src.preprocessing import cast_categorical
+from benchmarks.audit_overhead import SAMPLE
+
+
+def default_predict(X: pd.DataFrame) -> np.ndarray:
+    return backend.predict(X)
+
+
+def run(score, single: pd.DataFrame, batch: pd.DataFrame, callers: int, seconds: float,
+        batch_share: float) -> dict:
+    latencies = {"single": [], "batch": []}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def caller(seed: int):
+        rng = random.Random(seed)
+        local = {"single": [], "batch": []}
+        while time.perf_counter() < stop:
+            kind = "batch" if rng.random() < batch_share else "single"
+            start = time.perf_counter()
+            score(batch if kind == "batch" else single)
+            local[kind].append((time.perf_counter() - start) * 1000)
+        with lock:
+            for kind, values in local.items():
+                latencies[kind].extend(values)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    rows = len(latencies["single"]) + len(latencies["batch"]) * len(batch)
+    return {
+        "requests_per_s": (len(latencies["single"]) + len(latencies["batch"])) / elapsed,
+        "rows_per_s": rows / elapsed,
+        "single_p99_ms": float(np.percentile(latencies["single"], 99)),
+        "batch_p99_ms": float(np.percentile(latencies["batch"], 99)) if latencies["batch"] else float("nan"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--callers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--batch-rows", type=int, default=1024)
+    parser.add_argument("--batch-share", type=float, default=0.02)
+    args = parser.parse_args()
+
+    raw = pd.DataFrame([SAMPLE] * args.batch_rows)
+    X = cast_categorical(add_interaction_features(raw), model.pandas_categorical)[FEATURES]
+    single = X.iloc[:1]
+
+    print(f"cores={planner.cores} calibrated={planner.calibrated} callers={args.callers} "
+          f"batch={args.batch_rows} rows x {args.batch_share:.0%}")
+    for name, score in (("default", default_predict), ("planned", score_full)):
+        r = run(score, single, X, args.callers, args.seconds, args.batch_share)
+        print(f"{name:<8} {r['requests_per_s']:8.0f} req/s  {r['rows_per_s']:9.0f} rows/s  "
+              f"single p99={r['single_p99_ms']:.2f}ms  batch p99={r['batch_p99_ms']:.2f}ms")
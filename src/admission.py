@@ -0,0 +1,88 @@
+# src/admission.py
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AdmissionController:
+    """
+    Load shedding for the scoring endpoint.
+
+    Tracks requests in flight and an EWMA of handler service time. A new
+    request is rejected with 429 when `max_in_flight` requests are already
+    admitted, and with 503 when its deadline is shorter than the estimated
+    time to serve it behind the work already in flight.
+    """
+
+    def __init__(self, max_in_flight: int, workers: int, alpha: float = 0.1,
+                 initial_service_ms: float = 10.0):
+        self.max_in_flight = max_in_flight
+        self.workers = max(1, workers)
+        self.alpha = alpha
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.service_ms = initial_service_ms
+        self.admitted = 0
+        self.shed_capacity = 0
+        self.shed_deadline = 0
+
+    def estimate_ms(self, in_flight: int) -> float:
+        """
+        Expected latency for a request arriving behind `in_flight` others.
+        """
+        waves = 1 + max(0, in_flight + 1 - self.workers) / self.workers
+        return self.service_ms * waves
+
+    def try_admit(self, deadline_ms: float = None):
+        """
+        Admit the request and return None, or return (status, reason).
+        """
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.shed_capacity += 1
+                return 429, f"Server at capacity ({self.in_flight} requests in flight)"
+
+            estimate = self.estimate_ms(self.in_flight)
+            if deadline_ms is not None and estimate > deadline_ms:
+                self.shed_deadline += 1
+                return 503, f"Cannot meet {deadline_ms:.0f}ms deadline (estimated {estimate:.1f}ms)"
+
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    @contextmanager
+    def timed(self):
+        """
+        Measure handler service time into the EWMA.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.service_ms += self.alpha * (elapsed - self.service_ms)
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "policy": {
+                    "max_in_flight": self.max_in_flight,
+                    "workers": self.workers,
+                    "capacity_status": 429,
+                    "deadline_status": 503,
+                },
+                "in_flight": self.in_flight,
+                "service_ms": round(self.service_ms, 3),
+                "estimated_ms": round(self.estimate_ms(self.in_flight), 3),
+                "admitted": self.admitted,
+                "shed_capacity": self.shed_capacity,
+                "shed_deadline": self.shed_deadline,
+            }
@@ -0,0 +1,174 @@
+# src/audit.py
+
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+import warnings
+from datetime import datetime, timezone
+
+_STOP = object()
+
+
+class AuditLogFull(Exception):
+    pass
+
+
+class AuditSink:
+    """
+    Batched audit log of scored requests.
+
+    Records are queued in memory and written by a background thread as
+    gzip-compressed NDJSON, one gzip member per batch, rotating to a new
+    file every `rotate_records` records. When the queue is full, `record`
+    blocks for up to `put_timeout` seconds and then raises AuditLogFull, so
+    callers slow down instead of losing audit records. `record_many` queues
+    a group of records as one item, so the group is logged whole or not at
+    all.
+    """
+
+    def __init__(self, directory: str, max_queue: int = 10000, batch_size: int = 500,
+                 flush_seconds: float = 1.0, rotate_records: int = 100000,
+                 put_timeout: float = 0.5, prefix: str = "audit"):
+        self.directory = directory
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.rotate_records = rotate_records
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+
+        self._path = None
+        self._file_records = 0
+        self.written = 0
+        self.rejected = 0
+        self.files = 0
+        self.errors = 0
+        self.last_error = None
+        self._closing = False
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+            self._thread.start()
+        return self
+
+    @staticmethod
+    def _entry(transaction: dict, result: dict) -> dict:
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "model_version": result["model_version"],
+            "risk_score": result["risk_score"],
+            "fraud_flag": result["fraud_flag"],
+            "stage": result.get("stage"),
+            "input": transaction,
+        }
+
+    def _put(self, item, records: int):
+        try:
+            self._queue.put(item, timeout=self.put_timeout)
+        except queue.Full:
+            self.rejected += records
+            raise AuditLogFull("Audit log queue is full")
+
+    def record(self, transaction: dict, result: dict):
+        """
+        Queue one decision, blocking briefly if the writer is behind.
+        """
+        self._put(self._entry(transaction, result), 1)
+
+    def record_many(self, transactions: list, results: list):
+        """
+        Queue several decisions as one queue item, so either all of them are
+        logged or AuditLogFull is raised before any is.
+        """
+        entries = [self._entry(t, r) for t, r in zip(transactions, results)]
+        self._put(entries, len(entries))
+
+    def close(self):
+        """
+        Flush everything queued so far and stop the writer.
+        """
+        if self._thread is not None:
+            self._closing = True
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            if len(batch) >= self.batch_size:
+                # A failed write is held for retry; taking no more records lets
+                # the queue fill, so callers see AuditLogFull, not lost records
+                if self._closing:
+                    self._flush(batch)
+                    return
+                time.sleep(timeout)
+                entry = None
+            else:
+                try:
+                    entry = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    entry = None
+
+            if entry is _STOP:
+                self._flush(batch)
+                return
+            if isinstance(entry, list):
+                batch.extend(entry)
+            elif entry is not None:
+                batch.append(entry)
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                if self._flush(batch):
+                    batch = []
+                deadline = time.monotonic() + self.flush_seconds
+
+    def _flush(self, batch: list) -> bool:
+        """
+        Write `batch`; on failure count the error and keep the writer alive.
+        """
+        try:
+            self._write(batch)
+            return True
+        except Exception as e:
+            self.errors += 1
+            self.last_error = repr(e)
+            warnings.warn(f"Audit writer failed to write {len(batch)} records, retrying: {e!r}")
+            return False
+
+    def _write(self, batch: list):
+        if not batch:
+            return
+        if self._path is None or self._file_records >= self.rotate_records:
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+            self._path = os.path.join(self.directory, f"{self.prefix}-{stamp}-{self.files:05d}.ndjson.gz")
+            self._file_records = 0
+            self.files += 1
+
+        # Values JSON cannot encode (numpy scalars, dates) are logged as strings
+        lines = "".join(json.dumps(entry, default=str) + "\n" for entry in batch)
+        with gzip.open(self._path, "at") as f:
+            f.write(lines)
+
+        self._file_records += len(batch)
+        self.written += len(batch)
+
+    def report(self) -> dict:
+        return {
+            "written": self.written,
+            "pending": self._queue.qsize(),
+            "rejected": self.rejected,
+            "files": self.files,
+            "current_file": self._path,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "thread_alive": self._thread is not None and self._thread.is_alive(),
+        }
@@ -0,0 +1,273 @@
+# src/backends.py
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    FEATURES,
+    CAT_COLS,
+    MODEL_PATH,
+    DATA_PATH,
+    TRAIN_MAX_MONTH,
+    FRAUD_THRESHOLD,
+    RANDOM_STATE,
+)
+
+# Optional: ONNX scoring needs onnxruntime, export also needs onnxmltools
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+
+def onnx_model_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".onnx"
+
+
+def calibration_sample_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + "_calibration.csv"
+
+
+def encode_matrix(X: pd.DataFrame, categories: list) -> np.ndarray:
+    """
+    float32 feature matrix with categoricals as the booster's category codes
+    (unseen values and missing become NaN, as in LightGBM).
+    """
+    X = X[FEATURES].copy()
+    for i, c in enumerate(CAT_COLS):
+        codes = pd.Categorical(X[c], categories=categories[i]).codes.astype(np.float32)
+        codes[codes < 0] = np.nan
+        X[c] = codes
+    return X.to_numpy(dtype=np.float32)
+
+
+class LightGBMBackend:
+    name = "lightgbm"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, X: pd.DataFrame, num_threads: int = 0, matrix: bool = False) -> np.ndarray:
+        """
+        `num_threads=0` uses LightGBM's default; `matrix` passes the encoded
+        float32 matrix instead of the DataFrame, skipping pandas conversion.
+        """
+        if matrix:
+            X = encode_matrix(X, self.model.pandas_categorical)
+        return self.model.predict(X, num_threads=num_threads)
+
+
+class OnnxBackend:
+    """
+    The booster exported to ONNX, run with onnxruntime on CPU.
+    """
+    name = "onnx"
+
+    def __init__(self, path: str, categories: list):
+        self.path = path
+        self.categories = categories
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.input_name = self._session(0).get_inputs()[0].name
+
+    def _session(self, num_threads: int):
+        # Thread count is fixed per session, so keep one per count used
+        with self._lock:
+            if num_threads not in self._sessions:
+                options = onnxruntime.SessionOptions()
+                options.log_severity_level = 3
+                options.intra_op_num_threads = num_threads
+                self._sessions[num_threads] = onnxruntime.InferenceSession(
+                    self.path, options, providers=["CPUExecutionProvider"]
+                )
+            return self._sessions[num_threads]
+
+    def predict(self, X: pd.DataFrame, num_threads: int = 0, matrix: bool = True) -> np.ndarray:
+        # ONNX always takes the encoded matrix; `matrix` is accepted for symmetry
+        features = encode_matrix(X, self.categories)
+        probabilities = self._session(num_threads).run(["probabilities"], {self.input_name: features})[0]
+        return probabilities[:, 1].astype(np.float64)
+
+
+def export_onnx(model, path: str):
+    """
+    Convert a LightGBM booster to ONNX (probabilities as an (n, 2) tensor).
+    """
+    import onnxmltools
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    onx = onnxmltools.convert_lightgbm(
+        model,
+        initial_types=[("input", FloatTensorType([None, len(FEATURES)]))],
+        target_opset=15,
+        zipmap=False,
+    )
+    with open(path, "wb") as f:
+        f.write(onx.SerializeToString())
+
+
+def check_parity(reference: np.ndarray, backend, X: pd.DataFrame, atol: float = 1e-5,
+                 threshold: float = FRAUD_THRESHOLD) -> dict:
+    """
+    Compare a backend's scores with the native booster's scores on `X`.
+
+    ONNX tree ensembles compare thresholds in float32, so scores may differ
+    slightly; the backend passes if no score moves by more than `atol` and
+    every fraud flag is unchanged.
+    """
+    scores = backend.predict(X)
+    diff = np.abs(scores - reference)
+    flag_changes = int(((scores >= threshold) != (reference >= threshold)).sum())
+    return {
+        "backend": backend.name,
+        "rows": len(X),
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "flag_changes": flag_changes,
+        "passed": bool(diff.max() <= atol and flag_changes == 0),
+    }
+
+
+def time_predict_ms(backend, X: pd.DataFrame, repeats: int, **options) -> float:
+    """
+    Median latency of `backend.predict(X, **options)` after one warm-up call.
+    """
+    backend.predict(X, **options)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.predict(X, **options)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def calibrate_backends(backends: dict, X: pd.DataFrame, batch_sizes=(1, 8, 64, 512, 4096),
+                       rows_per_size: int = 4096) -> list:
+    """
+    Time every backend at each batch size and return the routing plan: a
+    list of {max_rows, backend, timings_ms} ranges, the last one open-ended.
+
+    A batch is routed to the first range whose `max_rows` covers it, so a
+    measured size stands for every batch between it and the size below.
+    """
+    plan = []
+    for size in batch_sizes:
+        batch = X.iloc[np.arange(size) % len(X)]
+        repeats = max(3, min(50, rows_per_size // size))
+        timings = {name: round(time_predict_ms(b, batch, repeats), 4) for name, b in backends.items()}
+        fastest = min(timings, key=timings.get)
+
+        if plan and plan[-1]["backend"] == fastest:
+            plan[-1]["max_rows"] = size
+            plan[-1]["timings_ms"][str(size)] = timings
+        else:
+            plan.append({"max_rows": size, "backend": fastest, "timings_ms": {str(size): timings}})
+
+    plan[-1]["max_rows"] = None
+    return plan
+
+
+class BackendRouter:
+    """
+    Scores each batch with the backend calibrated as fastest for its size.
+    """
+
+    def __init__(self, backends: dict, plan: list, parity: list = None):
+        self.backends = backends
+        self.plan = plan
+        self.parity = parity or []
+        self.calls = {name: 0 for name in backends}
+        self._lock = threading.Lock()
+
+    def backend_for(self, rows: int):
+        for entry in self.plan:
+            if entry["max_rows"] is None or rows <= entry["max_rows"]:
+                return self.backends[entry["backend"]]
+        return self.backends[self.plan[-1]["backend"]]
+
+    def predict(self, X: pd.DataFrame, **options) -> np.ndarray:
+        backend = self.backend_for(len(X))
+        with self._lock:
+            self.calls[backend.name] += 1
+        return backend.predict(X, **options)
+
+    def _calls(self) -> dict:
+        with self._lock:
+            return dict(self.calls)
+
+    def report(self) -> dict:
+        return {
+            "available": list(self.backends),
+            "plan": self.plan,
+            "parity": self.parity,
+            "calls": self._calls(),
+        }
+
+
+def load_calibration_sample(model, model_path: str):
+    """
+    Model-ready features of the stored calibration sample, or None.
+    """
+    path = calibration_sample_path(model_path)
+    if not os.path.exists(path):
+        return None
+
+    from src.features import add_interaction_features
+    from src.preprocessing import cast_categorical
+
+    sample = cast_categorical(add_interaction_features(pd.read_csv(path)), model.pandas_categorical)
+    return sample[FEATURES]
+
+
+def load_backends(model, model_path: str, sample: pd.DataFrame = None, calibrated: tuple = None) -> BackendRouter:
+    """
+    Native LightGBM, plus ONNX when onnxruntime is installed and an export
+    exists next to the model. With a calibration sample, ONNX is checked
+    against LightGBM and both are timed to build the routing plan;
+    otherwise every batch goes to LightGBM.
+
+    `calibrated` is the (parity, plan) of an earlier router for the same
+    model file, reused instead of checking and timing again.
+    """
+    native = LightGBMBackend(model)
+    backends = {native.name: native}
+    default = [{"max_rows": None, "backend": native.name, "timings_ms": {}}]
+
+    path = onnx_model_path(model_path)
+    if onnxruntime is None or not os.path.exists(path) or sample is None:
+        return BackendRouter(backends, default)
+
+    if calibrated is not None:
+        parity, plan = calibrated
+        if parity and parity[0]["passed"]:
+            backends["onnx"] = OnnxBackend(path, model.pandas_categorical)
+        return BackendRouter(backends, plan, parity)
+
+    onnx = OnnxBackend(path, model.pandas_categorical)
+    parity = check_parity(native.predict(sample), onnx, sample)
+    if not parity["passed"]:
+        return BackendRouter(backends, default, [parity])
+
+    backends[onnx.name] = onnx
+    return BackendRouter(backends, calibrate_backends(backends, sample), [parity])
+
+
+if __name__ == "__main__":
+    # Export the ONNX model and a calibration sample of the validation
+    # months; parity is checked by tests/test_backends.py and at load time.
+    from src.model import load_model
+
+    model = load_model(MODEL_PATH)
+    data = pd.read_csv(DATA_PATH)
+    valid_raw = data[data["month"] > TRAIN_MAX_MONTH]
+
+    export_onnx(model, onnx_model_path(MODEL_PATH))
+    valid_raw.sample(n=min(4096, len(valid_raw)), random_state=RANDOM_STATE).to_csv(
+        calibration_sample_path(MODEL_PATH), index=False
+    )
+    print(json.dumps({"onnx": onnx_model_path(MODEL_PATH), "calibration_sample": calibration_sample_path(MODEL_PATH)}, indent=2))
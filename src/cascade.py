@@ -0,0 +1,118 @@
+# src/cascade.py
+
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    FEATURES,
+    MODEL_PATH,
+    DATA_PATH,
+    TRAIN_MAX_MONTH,
+    FRAUD_THRESHOLD,
+    CASCADE_MAX_FLAG_CHANGE,
+)
+
+
+def cascade_config_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + "_cascade.json"
+
+
+def num_iterations(model) -> int:
+    """
+    Iterations used by a default `model.predict` call.
+    """
+    return model.best_iteration if model.best_iteration > 0 else model.current_iteration()
+
+
+def sigmoid(raw):
+    return 1.0 / (1.0 + np.exp(-raw))
+
+
+def calibrate_cascade(model, X: pd.DataFrame, max_flag_change: float = CASCADE_MAX_FLAG_CHANGE,
+                      fractions=(0.05, 0.1, 0.2, 0.3, 0.5), threshold: float = FRAUD_THRESHOLD) -> dict:
+    """
+    Pick the prefix length K and safe band that minimise expected trees per
+    request, subject to changing at most `max_flag_change` of the rows the
+    full model flags at `threshold` (a share of fraud flags, not of rows).
+
+    A request exits after K iterations when its partial score is below
+    `safe_below`; otherwise the remaining iterations are added to the
+    partial raw score, so uncertain requests never re-evaluate the prefix.
+
+    Raises ValueError for a booster with fewer than 2 iterations, which has
+    no prefix to exit after.
+    """
+    n_iter = num_iterations(model)
+    if n_iter < 2:
+        raise ValueError(f"An early-exit cascade needs at least 2 iterations, the model has {n_iter}")
+    full_flag = model.predict(X, num_iteration=n_iter) >= threshold
+    allowed = int(np.floor(max_flag_change * full_flag.sum()))
+
+    best = None
+    for k in sorted({max(1, int(n_iter * f)) for f in fractions}):
+        if k >= n_iter:
+            continue
+        partial = sigmoid(model.predict(X, num_iteration=k, raw_score=True))
+
+        # Exiting returns flag 0, so only flagged rows below the band change
+        flagged = np.sort(partial[full_flag])
+        safe_below = threshold if len(flagged) <= allowed else min(flagged[allowed], threshold)
+
+        exits = partial < safe_below
+        cost = k + (1 - exits.mean()) * (n_iter - k)
+        candidate = {
+            "k": k,
+            "num_iterations": n_iter,
+            "safe_below": float(safe_below),
+            "exit_rate": round(float(exits.mean()), 4),
+            "flag_change": round(float((exits & full_flag).sum() / max(1, full_flag.sum())), 6),
+            "expected_trees": round(float(cost), 1),
+        }
+        if best is None or cost < best["expected_trees"]:
+            best = candidate
+
+    return best
+
+
+def save_cascade(config: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def load_cascade(path: str, model=None):
+    """
+    The stored calibration, or None. With `model`, a calibration made for a
+    different number of iterations (a stale file after retraining) is
+    rejected, since its K and band no longer describe this booster.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        warnings.warn(f"Ignoring {path}: not a cascade calibration; rerun src.cascade")
+        return None
+    if model is not None and (config["num_iterations"] != num_iterations(model)
+                              or config["k"] >= num_iterations(model)):
+        warnings.warn(f"Ignoring {path}: calibrated for {config['num_iterations']} iterations, "
+                      f"model has {num_iterations(model)}; rerun src.cascade")
+        return None
+    return config
+
+
+if __name__ == "__main__":
+    from src.model import load_model
+    from src.features import add_interaction_features
+    from src.preprocessing import cast_categorical
+
+    model = load_model(MODEL_PATH)
+    data = pd.read_csv(DATA_PATH)
+    valid = cast_categorical(add_interaction_features(data[data["month"] > TRAIN_MAX_MONTH]))
+
+    config = calibrate_cascade(model, valid[FEATURES])
+    save_cascade(config, cascade_config_path(MODEL_PATH))
+    print(json.dumps(config, indent=2))
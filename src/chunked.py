@@ -0,0 +1,111 @@
+# src/chunked.py
+
+import os
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from src.config import FEATURES, TARGET, CAT_COLS
+from src.features import add_interaction_features
+from src.backends import encode_matrix
+
+
+def read_chunks(paths: list, chunksize: int, usecols=None):
+    """
+    Raw DataFrame chunks of every CSV in `paths`, in order.
+    """
+    for path in paths:
+        for chunk in pd.read_csv(path, chunksize=chunksize, usecols=usecols):
+            yield chunk
+
+
+def scan_sources(paths: list, chunksize: int, train_max_month: int) -> dict:
+    """
+    First pass over the categorical, label and month columns only: row and
+    label counts per split, and the sorted categories of every CAT_COL in
+    the training rows (the order `cast_categorical` gives the in-memory
+    training frame; validation-only values are encoded as missing).
+    """
+    seen = {c: set() for c in CAT_COLS}
+    counts = {"train": [0, 0], "valid": [0, 0]}
+    for chunk in read_chunks(paths, chunksize, usecols=CAT_COLS + [TARGET]):
+        is_train = chunk["month"] <= train_max_month
+        for c in CAT_COLS:
+            seen[c].update(chunk.loc[is_train, c].dropna().unique().tolist())
+        for split, rows in (("train", chunk[is_train]), ("valid", chunk[~is_train])):
+            counts[split][0] += len(rows)
+            counts[split][1] += int(rows[TARGET].sum())
+
+    return {
+        "categories": [sorted(seen[c]) for c in CAT_COLS],
+        "rows": {split: n for split, (n, _) in counts.items()},
+        "positives": {split: p for split, (_, p) in counts.items()},
+    }
+
+
+class SpooledSequence(lgb.Sequence):
+    """
+    Model-ready float32 rows spooled to disk, read back through a memmap so
+    LightGBM's sampling and batched pushes only touch pages they need.
+    """
+
+    def __init__(self, path: str, rows: int, batch_size: int):
+        self.data = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, len(FEATURES)))
+        self.batch_size = batch_size
+
+    def __getitem__(self, idx):
+        # LightGBM requires float64 rows when sampling for bin boundaries
+        return np.asarray(self.data[idx], dtype=np.float64)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+
+def spool_sources(paths: list, chunksize: int, train_max_month: int, categories: list,
+                  directory: str, sample_fraction: float = 0.0, seed: int = 42) -> dict:
+    """
+    Second pass: add the interaction features and encode every chunk, then
+    append features and labels of each split to raw files in `directory`.
+
+    Also keeps a `sample_fraction` random sample of the transformed training
+    rows (for the drift profile). Returns {split: (features, labels, rows)}
+    and the sample.
+    """
+    rng = np.random.default_rng(seed)
+    files = {
+        split: (os.path.join(directory, f"{split}.f32"), os.path.join(directory, f"{split}.label"))
+        for split in ("train", "valid")
+    }
+    handles = {split: (open(f, "wb"), open(l, "wb")) for split, (f, l) in files.items()}
+    rows = {"train": 0, "valid": 0}
+    samples = []
+
+    try:
+        for chunk in read_chunks(paths, chunksize):
+            chunk = add_interaction_features(chunk)
+            is_train = (chunk["month"] <= train_max_month).to_numpy()
+            for split, mask in (("train", is_train), ("valid", ~is_train)):
+                part = chunk[mask]
+                if part.empty:
+                    continue
+                features, labels = handles[split]
+                features.write(encode_matrix(part, categories).tobytes())
+                labels.write(part[TARGET].to_numpy(dtype=np.float32).tobytes())
+                rows[split] += len(part)
+
+            if sample_fraction > 0:
+                train = chunk[is_train]
+                samples.append(train[rng.random(len(train)) < sample_fraction])
+    finally:
+        for features, labels in handles.values():
+            features.close()
+            labels.close()
+
+    spools = {split: (*files[split], rows[split]) for split in files}
+    sample = pd.concat(samples, ignore_index=True) if samples else None
+    return {"spools": spools, "sample": sample}
+
+
+def load_labels(path: str, rows: int) -> np.ndarray:
+    return np.memmap(path, dtype=np.float32, mode="r", shape=(rows,))
@@ -0,0 +1,213 @@
+# src/compaction.py
+
+import json
+import os
+import re
+import time
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    FEATURES,
+    TARGET,
+    CAT_COLS,
+    MODEL_PATH,
+    DATA_PATH,
+    TRAIN_MAX_MONTH,
+    FRAUD_THRESHOLD,
+    RANDOM_STATE,
+)
+from src.cascade import num_iterations
+
+
+def compaction_report_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + "_compaction.json"
+
+
+def truncate(model, k: int) -> lgb.Booster:
+    """
+    Booster holding only the first `k` iterations.
+    """
+    return lgb.Booster(model_str=model.model_to_string(num_iteration=k))
+
+
+def drop_trees(model, keep) -> lgb.Booster:
+    """
+    Booster holding only the trees whose indices are in `keep`.
+
+    Trees are cut out of the text model and renumbered; `tree_sizes` is
+    removed so LightGBM re-parses the blocks sequentially.
+    """
+    text = model.model_to_string(num_iteration=num_iterations(model))
+    start = text.index("Tree=0")
+    end = text.index("end of trees")
+
+    header = re.sub(r"^tree_sizes=.*\n", "", text[:start], flags=re.M)
+    blocks = text[start:end].strip().split("\n\n\n")
+
+    kept = [
+        re.sub(r"^Tree=\d+", f"Tree={i}", blocks[t])
+        for i, t in enumerate(sorted(keep))
+    ]
+    return lgb.Booster(model_str=header + "\n\n\n".join(kept) + "\n\n\n" + text[end:])
+
+
+def tree_impact(model, X: pd.DataFrame) -> np.ndarray:
+    """
+    Mean absolute raw-score contribution of each tree on `X`.
+    """
+    n_iter = num_iterations(model)
+    leaves = model.predict(X, num_iteration=n_iter, pred_leaf=True)
+    impact = np.zeros(n_iter)
+    for t in range(n_iter):
+        ids, inverse = np.unique(leaves[:, t], return_inverse=True)
+        values = np.array([model.get_leaf_output(t, int(leaf)) for leaf in ids])
+        impact[t] = np.abs(values[inverse]).mean()
+    return impact
+
+
+def prune(model, X: pd.DataFrame, keep_fraction: float, impact: np.ndarray = None) -> lgb.Booster:
+    """
+    Keep the `keep_fraction` of trees with the largest impact on `X`.
+    """
+    impact = tree_impact(model, X) if impact is None else impact
+    n_keep = max(1, int(len(impact) * keep_fraction))
+    return drop_trees(model, np.argsort(impact)[-n_keep:])
+
+
+def distill(teacher, X_train: pd.DataFrame, num_leaves: int, num_boost_round: int) -> lgb.Booster:
+    """
+    Small student fitted to the teacher's probabilities (cross-entropy on
+    soft labels).
+    """
+    params = {
+        "objective": "cross_entropy",
+        "learning_rate": 0.1,
+        "num_leaves": num_leaves,
+        "min_data_in_leaf": 50,
+        "verbosity": -1,
+        "seed": RANDOM_STATE,
+    }
+    soft_labels = teacher.predict(X_train)
+    return lgb.train(
+        params,
+        lgb.Dataset(X_train, soft_labels, categorical_feature=CAT_COLS),
+        num_boost_round=num_boost_round
+    )
+
+
+def measure(model, X: pd.DataFrame, y: pd.Series, teacher_flags: np.ndarray,
+            n_single: int = 500, batch_size: int = 1000) -> dict:
+    """
+    Single-row and batch latency, size and accuracy of one candidate.
+
+    Truncated and pruned candidates are partial additive ensembles whose
+    scores sit on another scale, so besides recall at FRAUD_THRESHOLD the
+    candidate gets `matched_threshold`: the score quantile that flags the
+    same share of `X` as the teacher (label-free), with recall and flag
+    agreement at it. Timings are of DataFrame `model.predict` on native
+    LightGBM, not of the served path (backend routing, thread planning).
+    """
+    rows = [X.iloc[[i]] for i in range(min(n_single, len(X)))]
+    single = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict(row)
+        single.append((time.perf_counter() - start) * 1000)
+
+    batch = X.iloc[:batch_size]
+    start = time.perf_counter()
+    model.predict(batch)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    scores = model.predict(X)
+    flags = scores >= FRAUD_THRESHOLD
+    positives = (y == 1).to_numpy()
+
+    matched_threshold = float(np.quantile(scores, 1 - teacher_flags.mean()))
+    matched_flags = scores >= matched_threshold
+
+    return {
+        "trees": model.num_trees(),
+        "size_kb": round(len(model.model_to_string()) / 1024, 1),
+        "single_p50_ms": round(float(np.percentile(single, 50)), 3),
+        "single_p99_ms": round(float(np.percentile(single, 99)), 3),
+        "batch_ms": round(batch_ms, 2),
+        "batch_size": len(batch),
+        "recall": round(float(flags[positives].mean()), 4),
+        "flag_agreement": round(float((flags == teacher_flags).mean()), 4),
+        "matched_threshold": round(matched_threshold, 6),
+        "matched_recall": round(float(matched_flags[positives].mean()), 4),
+        "matched_flag_agreement": round(float((matched_flags == teacher_flags).mean()), 4),
+    }
+
+
+def _mark_frontier(candidates: list):
+    """
+    Flag candidates not beaten on both single-row p50 latency and recall at
+    their matched threshold (the comparable operating point).
+    """
+    for c in candidates:
+        c["frontier"] = not any(
+            o["single_p50_ms"] <= c["single_p50_ms"] and o["matched_recall"] >= c["matched_recall"]
+            and (o["single_p50_ms"] < c["single_p50_ms"] or o["matched_recall"] > c["matched_recall"])
+            for o in candidates
+        )
+
+
+def compact(model, train_df: pd.DataFrame, valid_df: pd.DataFrame,
+            fractions=(0.1, 0.25, 0.5), students=((15, 100), (31, 200)),
+            sample_size: int = 50000, output_dir: str = None) -> list:
+    """
+    Build truncated, pruned and distilled candidates from `model` and
+    measure each on `valid_df`. Both frames must already be feature
+    engineered and cast to categories.
+    """
+    X_train = train_df[FEATURES]
+    if len(X_train) > sample_size:
+        X_train = X_train.sample(sample_size, random_state=RANDOM_STATE)
+    X_valid, y_valid = valid_df[FEATURES], valid_df[TARGET]
+
+    n_iter = num_iterations(model)
+    teacher_flags = model.predict(X_valid) >= FRAUD_THRESHOLD
+    impact = tree_impact(model, X_train)
+
+    candidates = [("original", model)]
+    for f in fractions:
+        k = max(1, int(n_iter * f))
+        candidates.append((f"truncated_{k}", truncate(model, k)))
+        candidates.append((f"pruned_{k}", prune(model, X_train, f, impact)))
+    for num_leaves, rounds in students:
+        candidates.append((
+            f"student_{num_leaves}x{rounds}",
+            distill(model, X_train, num_leaves, rounds)
+        ))
+
+    report = []
+    for name, candidate in candidates:
+        report.append({"name": name, **measure(candidate, X_valid, y_valid, teacher_flags)})
+        if output_dir is not None:
+            candidate.save_model(os.path.join(output_dir, f"{name}.txt"))
+
+    _mark_frontier(report)
+    return report
+
+
+if __name__ == "__main__":
+    from src.model import load_model
+    from src.features import add_interaction_features
+    from src.preprocessing import cast_categorical
+
+    model = load_model(MODEL_PATH)
+    data = pd.read_csv(DATA_PATH)
+    train_df, valid_df = (
+        cast_categorical(add_interaction_features(part), model.pandas_categorical)
+        for part in (data[data["month"] <= TRAIN_MAX_MONTH], data[data["month"] > TRAIN_MAX_MONTH])
+    )
+
+    report = compact(model, train_df, valid_df)
+    with open(compaction_report_path(MODEL_PATH), "w") as f:
+        json.dump(report, f, indent=2)
+    print(pd.DataFrame(report).to_string(index=False))
@@ -1,4 +1,6 @@
 
+import os
+
 TARGET = "fraud_bool"
 
 NUM_COLS = [
@@ -26,7 +28,88 @@ CAT_COLS = [
 
 FEATURES = NUM_COLS + BIN_COLS + CAT_COLS
 
+DATA_PATH = "raw_data/Base.csv"
+TRAIN_MAX_MONTH = 6   # months <= 6 train, later months validate
+
 MODEL_PATH = "models/lgb_modified.pkl"
+BEST_PARAMS_PATH = "models/best_params.json"   # written by src/tuning.py
 RANDOM_STATE = 42
 MODEL_VERSION = "v2"
 FRAUD_THRESHOLD = 0.75   # precomputed offline
+CASCADE_MAX_FLAG_CHANGE = 0.001   # share of the full model's fraud flags early exit may change
+NEGATIVE_SAMPLE_RATE = 0.1   # share of non-fraud rows kept by train_model_downsampled
+
+# Live dashboard aggregates
+HEATMAP_AMOUNT_COL = "proposed_credit_limit"
+HEATMAP_AMOUNT_BINS = 6   # quantile rows taken from the training data by train_model
+HEATMAP_AMOUNT_EDGES = [190, 500, 1000, 1500, 2000]   # fallback: the column's training range is about 190-2100
+
+# Drift monitoring (population stability index)
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+
+# Shadow scoring: challenger name -> model path, scored off the request path
+SHADOW_MODELS = {}   # e.g. {"challenger": "models/lgb_challenger.pkl"}
+SHADOW_SAMPLE_RATE = 0.1
+SHADOW_LOG_PATH = "logs/shadow_scores.ndjson"
+
+# Audit log of every scored request (gzip NDJSON, written in batches)
+AUDIT_DIR = "logs/audit"
+AUDIT_QUEUE_SIZE = 10000
+AUDIT_BATCH_SIZE = 500
+AUDIT_FLUSH_SECONDS = 1.0
+AUDIT_ROTATE_RECORDS = 100000
+
+# Admission control for /predict
+ADMISSION_MAX_IN_FLIGHT = 64
+ADMISSION_WORKERS = os.cpu_count() or 1
+DEADLINE_HEADER = "X-Request-Deadline-Ms"   # optional per-request budget in ms
+
+# Binary socket scoring server (api/binary_server.py)
+BINARY_HOST = "127.0.0.1"
+BINARY_PORT = 9000
+BINARY_MAX_BATCH = 1024
+BINARY_BATCH_WAIT_MS = 1.0
+
+# Predict execution planner (src/inference.py)
+PREDICT_CORES = os.cpu_count() or 1
+PREDICT_MIN_THREAD_GAIN = 1.2   # speedup needed before a batch size is run multi-threaded
+
+# Shared-identifier ring index (src/rings.py)
+RING_IDENTIFIERS = ["device_id", "email", "phone", "address"]   # optional request fields
+RING_TTL_SECONDS = 8 * 7 * 24 * 3600   # 8 weeks, as in device_distinct_emails_8w
+RING_MAX_APPLICATIONS = 1_000_000
+RING_SAVE_SECONDS = 300   # index persisted this often, and on shutdown
+RING_INDEX_PATH = "logs/ring_index.json.gz"
+
+# Admin profiling endpoints (disabled unless the token is set)
+ADMIN_TOKEN = os.environ.get("SHIELDBANK_ADMIN_TOKEN")
+ADMIN_HEADER = "X-Admin-Token"
+PROFILE_DIR = "logs/profiles"
+PROFILE_MAX_SECONDS = 60
+
+# Offline evaluation (src/evaluation.py)
+EVAL_SEGMENTS = ["payment_type", "source", "device_os", "employment_status", "housing_status"]
+EVAL_FPR_TARGET = 0.05
+EVAL_BOOTSTRAP = 1000
+
+# Named models served at /models/{name}/predict (src/registry.py), e.g.
+#   {"online": {"path": "models/lgb_online.pkl", "version": "online-v1"}}
+MODEL_REGISTRY = {}
+MODEL_CACHE_MB = 512   # LRU bound on loaded named models
+MODEL_WARMUP = []      # names loaded at startup and never evicted
+
+# What-if sensitivity sweeps at /whatif (src/whatif.py)
+WHATIF_MAX_POINTS = 2500   # grid rows scored in one call
+WHATIF_DEFAULT_STEPS = 25
+
+# Tailing NDJSON scoring daemon (api/tail_scorer.py)
+TAIL_OUTPUT_PATH = "logs/tail_scores.ndjson"
+TAIL_CHECKPOINT_PATH = "logs/tail_checkpoint.json"
+TAIL_METRICS_PATH = "logs/tail_metrics.json"
+TAIL_MAX_BATCH = 1024
+TAIL_POLL_SECONDS = 0.5
+
+# Analyst review queue at /review (src/review.py)
+REVIEW_QUEUE_CAPACITY = 1000   # riskiest unreviewed transactions held
+REVIEW_TTL_SECONDS = 24 * 3600
@@ -0,0 +1,96 @@
+# src/downsampling.py
+
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+from src.config import (
+    FEATURES,
+    TARGET,
+    MODEL_PATH,
+    DATA_PATH,
+    BEST_PARAMS_PATH,
+    TRAIN_MAX_MONTH,
+    FRAUD_THRESHOLD,
+)
+
+
+def downsampling_report_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + "_downsampling.json"
+
+
+def _run(mode: str, negative_rate: float, correction: str, model_path: str, params_path: str) -> dict:
+    # Runs in a fresh process so peak RSS belongs to this training alone
+    from src.features import add_interaction_features
+    from src.preprocessing import cast_categorical
+    from src.profiling import process_memory
+    from src.train import train_model, train_model_downsampled, training_log_path
+
+    data = pd.read_csv(DATA_PATH)
+    train_df = data[data["month"] <= TRAIN_MAX_MONTH]
+    valid_df = data[data["month"] > TRAIN_MAX_MONTH]
+    loaded_mb = process_memory()["rss_mb"]
+
+    if mode == "full":
+        model = train_model(train_df, valid_df, model_path, params_path)
+    else:
+        model = train_model_downsampled(train_df, valid_df, model_path, negative_rate,
+                                        correction, params_path)
+    peak_mb = process_memory()["peak_rss_mb"]
+
+    with open(training_log_path(model_path)) as f:
+        log = json.load(f)
+
+    valid = cast_categorical(add_interaction_features(valid_df), model.pandas_categorical)
+    y = valid[TARGET].to_numpy()
+    scores = model.predict(valid[FEATURES])
+    flags = scores >= FRAUD_THRESHOLD
+
+    return {
+        "mode": mode,
+        "negative_rate": negative_rate,
+        "correction": correction,
+        "train_rows": log["rows"],
+        "train_seconds": log["seconds"],
+        "num_trees": log["num_trees"],
+        "peak_rss_mb": peak_mb,
+        "training_mb": round(peak_mb - loaded_mb, 1) if loaded_mb is not None else None,
+        "valid_auc": round(roc_auc_score(y, scores), 5),
+        "recall": round(float(flags[y == 1].mean()), 4),
+        "flag_rate": round(float(flags.mean()), 5),
+        "mean_score": round(float(scores.mean()), 5),
+    }
+
+
+def compare(rates=(0.05, 0.1, 0.25), corrections=("weights", "logit"),
+            params_path: str = BEST_PARAMS_PATH) -> list:
+    """
+    Full-data training next to downsampled training at each rate and
+    correction, each in its own process. Recall and flag rate are at
+    FRAUD_THRESHOLD; matching flag rates and mean scores show the correction
+    keeps scores on the full model's scale.
+    """
+    runs = [("full", 1.0, None)] + [("downsampled", r, c) for r in rates for c in corrections]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (mode, rate, correction) in enumerate(runs):
+            model_path = os.path.join(tmp, f"model_{i}.pkl")
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                results.append(pool.submit(_run, mode, rate, correction, model_path, params_path).result())
+
+    full = results[0]
+    for r in results:
+        r["speedup"] = round(full["train_seconds"] / r["train_seconds"], 2)
+        r["auc_change"] = round(r["valid_auc"] - full["valid_auc"], 5)
+    return results
+
+
+if __name__ == "__main__":
+    report = compare()
+    with open(downsampling_report_path(MODEL_PATH), "w") as f:
+        json.dump(report, f, indent=2)
+    print(pd.DataFrame(report).to_string(index=False))
@@ -0,0 +1,252 @@
+# src/drift.py
+
+import json
+import os
+import queue
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.config import NUM_COLS, BIN_COLS, CAT_COLS, PSI_WARN, PSI_ALERT, HEATMAP_AMOUNT_COL
+from src.features import add_interaction_features
+from src.heatmap import amount_edges
+
+SCORE_EDGES = np.linspace(0, 1, 11)[1:-1]
+
+# Calendar fields: live months never occur in the training months, so their
+# PSI would always alert; they are not monitored
+UNMONITORED = ["month"]
+
+
+def reference_profile_path(model_path: str) -> str:
+    """
+    The reference profile is stored next to the model it describes.
+    """
+    return os.path.splitext(model_path)[0] + "_profile.json"
+
+
+def _fractions(counts: np.ndarray) -> list:
+    total = counts.sum()
+    if total == 0:
+        return np.zeros(len(counts)).tolist()
+    return (counts / total).tolist()
+
+
+def _numeric_counts(values, edges) -> np.ndarray:
+    idx = np.searchsorted(edges, np.asarray(values, dtype=float), side="right")
+    return np.bincount(idx, minlength=len(edges) + 1)
+
+
+def build_reference_profile(df: pd.DataFrame, scores, n_bins: int = 10, max_categories: int = 20) -> dict:
+    """
+    Bin edges and expected frequencies for every monitored feature.
+
+    `df` must already contain the interaction features.
+    """
+    profile = {"numeric": {}, "categorical": {}}
+
+    for c in NUM_COLS:
+        values = df[c].astype(float).dropna().to_numpy()
+        quantiles = np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])
+        edges = np.unique(quantiles)
+        profile["numeric"][c] = {
+            "edges": edges.tolist(),
+            "expected": _fractions(_numeric_counts(values, edges)),
+        }
+
+    for c in CAT_COLS + BIN_COLS:
+        if c in UNMONITORED:
+            continue
+        freq = df[c].astype(str).value_counts()
+        categories = freq.index[:max_categories].tolist()
+        counts = np.append(freq.iloc[:max_categories].to_numpy(), freq.iloc[max_categories:].sum())
+        profile["categorical"][c] = {
+            "categories": categories,
+            "expected": _fractions(counts),
+        }
+
+    profile["score"] = {
+        "edges": SCORE_EDGES.tolist(),
+        "expected": _fractions(_numeric_counts(scores, SCORE_EDGES)),
+    }
+    # Rows of the live fraud heatmap, from the same training data
+    profile["heatmap_amount_edges"] = amount_edges(df[HEATMAP_AMOUNT_COL])
+    return profile
+
+
+def save_profile(profile: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(profile, f)
+
+
+def load_profile(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def psi(expected, actual, eps: float = 1e-4) -> float:
+    """
+    Population stability index between two binned distributions.
+    """
+    expected = np.clip(np.asarray(expected, dtype=float), eps, None)
+    actual = np.clip(np.asarray(actual, dtype=float), eps, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _status(value: float) -> str:
+    if value >= PSI_ALERT:
+        return "alert"
+    if value >= PSI_WARN:
+        return "warn"
+    return "stable"
+
+
+class DriftMonitor:
+    """
+    Streaming PSI monitor for live traffic against a reference profile.
+
+    The serving path only enqueues (row, score) pairs; a background thread
+    bins them in batches. All counts live in fixed-size arrays, and records
+    are dropped rather than queued when the worker falls behind.
+
+    The reference holds full-model scores, so rows queued without a score
+    (early exits, whose score is partial) are scored in the background by
+    `rescore`, which takes raw transactions.
+    """
+
+    def __init__(self, profile: dict, max_queue: int = 10000, batch_size: int = 512, rescore=None):
+        self.profile = profile
+        self.batch_size = batch_size
+        self.rescore = rescore
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self._numeric = {
+            c: np.zeros(len(p["edges"]) + 1, dtype=np.int64)
+            for c, p in profile["numeric"].items()
+        }
+        # Profiles stored before UNMONITORED existed still carry those fields
+        categorical = {c: p for c, p in profile["categorical"].items() if c not in UNMONITORED}
+        self._categorical = {
+            c: np.zeros(len(p["categories"]) + 1, dtype=np.int64)
+            for c, p in categorical.items()
+        }
+        self._index = {
+            c: {v: i for i, v in enumerate(p["categories"])}
+            for c, p in categorical.items()
+        }
+        self._score = np.zeros(len(profile["score"]["edges"]) + 1, dtype=np.int64)
+        self.observed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def observe(self, transaction: dict, score: float = None):
+        """
+        Record one scored transaction without blocking the caller.
+        """
+        try:
+            self._queue.put_nowait((transaction, score))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # A bad batch is counted and skipped; it must not stop the worker
+            try:
+                self.update(
+                    pd.DataFrame([row for row, _ in batch]),
+                    [score for _, score in batch]
+                )
+            except Exception as e:
+                self.errors += 1
+                self.last_error = repr(e)
+                warnings.warn(f"Drift monitor skipped a batch of {len(batch)}: {e!r}")
+
+    def update(self, df: pd.DataFrame, scores):
+        """
+        Bin a batch of raw transactions and their scores (None to rescore).
+        """
+        scores = np.array(scores, dtype=float)
+        missing = np.isnan(scores)
+        if missing.any() and self.rescore is not None:
+            scores[missing] = self.rescore(df[missing])
+        scores = scores[~np.isnan(scores)]
+        df = add_interaction_features(df)
+
+        numeric = {
+            c: _numeric_counts(df[c], np.asarray(p["edges"]))
+            for c, p in self.profile["numeric"].items()
+        }
+        categorical = {}
+        for c, index in self._index.items():
+            codes = df[c].astype(str).map(index).fillna(len(index)).astype(int)
+            categorical[c] = np.bincount(codes, minlength=len(index) + 1)
+        score = _numeric_counts(scores, np.asarray(self.profile["score"]["edges"]))
+
+        with self._lock:
+            for c, counts in numeric.items():
+                self._numeric[c] += counts
+            for c, counts in categorical.items():
+                self._categorical[c] += counts
+            self._score += score
+            self.observed += len(df)
+
+    def report(self) -> dict:
+        """
+        PSI per feature and for the risk score, worst first.
+        """
+        with self._lock:
+            numeric = {c: v.copy() for c, v in self._numeric.items()}
+            categorical = {c: v.copy() for c, v in self._categorical.items()}
+            score = self._score.copy()
+            observed = self.observed
+
+        features = []
+        for kind, counts in (("numeric", numeric), ("categorical", categorical)):
+            for c, actual in counts.items():
+                value = psi(self.profile[kind][c]["expected"], _fractions(actual))
+                features.append({
+                    "feature": c,
+                    "type": kind,
+                    "psi": round(value, 4),
+                    "status": _status(value),
+                })
+        features.sort(key=lambda f: f["psi"], reverse=True)
+
+        score_psi = psi(self.profile["score"]["expected"], _fractions(score))
+
+        return {
+            "observed": observed,
+            "dropped": self.dropped,
+            "pending": self._queue.qsize(),
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "thread_alive": self._thread is not None and self._thread.is_alive(),
+            "score": {"psi": round(score_psi, 4), "status": _status(score_psi)} if observed else None,
+            "features": features if observed else [],
+        }
+
+
+def load_drift_monitor(path: str, rescore=None):
+    """
+    Start a monitor for the profile at `path`, or None if the model has none.
+    """
+    if not os.path.exists(path):
+        return None
+    return DriftMonitor(load_profile(path), rescore=rescore).start()
@@ -0,0 +1,221 @@
+# src/evaluation.py
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    FEATURES,
+    TARGET,
+    MODEL_PATH,
+    MODEL_VERSION,
+    DATA_PATH,
+    TRAIN_MAX_MONTH,
+    FRAUD_THRESHOLD,
+    RANDOM_STATE,
+    EVAL_SEGMENTS,
+    EVAL_FPR_TARGET,
+    EVAL_BOOTSTRAP,
+)
+
+METRICS = ["recall", "fpr", "precision", "auc", "recall_at_fpr"]
+
+
+def evaluation_report_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + "_evaluation.json"
+
+
+def score_cells(y: np.ndarray, scores: np.ndarray, threshold: float, resolution: float = 1e-4) -> tuple:
+    """
+    Collapse rows into (score level, label) cells.
+
+    LightGBM scores are nearly all distinct, so scores are first bucketed
+    to `resolution` (at most 1 / resolution + 1 levels), with no bucket
+    straddling `threshold` so flags stay exact. Each level is the lowest
+    score in its bucket; AUC and curves are exact up to ties within a
+    bucket.
+
+    Returns the ascending levels, and for every cell its level index,
+    label and row count. Resampling rows with replacement is the same as a
+    multinomial draw over cells.
+    """
+    buckets = np.floor(scores / resolution).astype(np.int64)
+    edge = int(np.ceil(threshold / resolution))
+    flagged = scores >= threshold
+    buckets = np.where(flagged, np.maximum(buckets, edge), np.minimum(buckets, edge - 1))
+
+    _, inverse = np.unique(buckets, return_inverse=True)
+    levels = np.full(inverse.max() + 1, np.inf)
+    np.minimum.at(levels, inverse, scores)
+
+    keys, counts = np.unique(inverse * 2 + y.astype(np.int64), return_counts=True)
+    return levels, keys // 2, keys % 2, counts
+
+
+def metrics_from_counts(pos: np.ndarray, neg: np.ndarray, levels: np.ndarray,
+                        threshold: float, fpr_target: float) -> dict:
+    """
+    Metrics for B weighted samples at once from (B, G) fraud and non-fraud
+    counts per distinct score (ascending). AUC counts ties as half.
+    """
+    # Small segments can resample without frauds; those metrics become NaN
+    with np.errstate(invalid="ignore", divide="ignore"):
+        P = pos.sum(axis=1)
+        N = neg.sum(axis=1)
+
+        flagged = levels >= threshold
+        tp = pos[:, flagged].sum(axis=1)
+        fp = neg[:, flagged].sum(axis=1)
+
+        neg_below = np.cumsum(neg, axis=1) - neg
+        auc = (pos * (neg_below + 0.5 * neg)).sum(axis=1) / (P * N)
+
+        # Lowest score level whose flags stay within the FPR target
+        neg_at_or_above = N[:, None] - neg_below
+        pos_at_or_above = P[:, None] - (np.cumsum(pos, axis=1) - pos)
+        first = np.argmax(neg_at_or_above <= fpr_target * N[:, None], axis=1)
+        rows = np.arange(len(P))
+        within = neg_at_or_above[rows, first] <= fpr_target * N
+        recall_at_fpr = np.where(within, pos_at_or_above[rows, first], 0) / P
+
+        return {
+            "recall": tp / P,
+            "fpr": fp / N,
+            "precision": np.where(tp + fp > 0, tp / (tp + fp), np.nan),
+            "auc": auc,
+            "recall_at_fpr": recall_at_fpr,
+        }
+
+
+def _scatter(levels: np.ndarray, idx: np.ndarray, labels: np.ndarray, weights: np.ndarray) -> tuple:
+    # Each score level has at most one cell per label, so plain assignment is safe
+    pos = np.zeros((weights.shape[0], len(levels)))
+    neg = np.zeros((weights.shape[0], len(levels)))
+    pos[:, idx[labels == 1]] = weights[:, labels == 1]
+    neg[:, idx[labels == 0]] = weights[:, labels == 0]
+    return pos, neg
+
+
+def bootstrap_chunk(cells: tuple, n_resamples: int, seed, threshold: float, fpr_target: float) -> dict:
+    """
+    Metrics of `n_resamples` bootstrap resamples of one group.
+    """
+    levels, idx, labels, counts = cells
+    rng = np.random.default_rng(seed)
+    draws = rng.multinomial(counts.sum(), counts / counts.sum(), size=n_resamples)
+    pos, neg = _scatter(levels, idx, labels, draws)
+    return metrics_from_counts(pos, neg, levels, threshold, fpr_target)
+
+
+def _groups(df: pd.DataFrame, segments: list) -> list:
+    groups = [("overall", None, df)]
+    groups += [("month", int(m), part) for m, part in df.groupby("month", observed=True)]
+    for c in segments:
+        groups += [(c, str(v), part) for v, part in df.groupby(c, observed=True)]
+    return groups
+
+
+def evaluate(df: pd.DataFrame, scores: np.ndarray, segments: list = EVAL_SEGMENTS,
+             threshold: float = FRAUD_THRESHOLD, fpr_target: float = EVAL_FPR_TARGET,
+             n_bootstrap: int = EVAL_BOOTSTRAP, chunk_size: int = 100, n_workers: int = None,
+             seed: int = RANDOM_STATE, resolution: float = 1e-4) -> dict:
+    """
+    Recall, FPR and precision at `threshold`, AUC and recall at `fpr_target`
+    FPR, overall, per month and per segment value, each with a 95%
+    bootstrap interval. Bootstrap chunks of every group run across a
+    process pool; each chunk is vectorized over its resamples, on score
+    levels bucketed to `resolution`, so a chunk's arrays are bounded by
+    `chunk_size` x (1 / resolution + 1) whatever the group size.
+    """
+    df = df.assign(_y=df[TARGET].to_numpy(), _score=scores)
+    groups = [g for g in _groups(df, segments) if 0 < g[2]["_y"].sum() < len(g[2])]
+
+    chunks = [chunk_size] * (n_bootstrap // chunk_size)
+    if n_bootstrap % chunk_size:
+        chunks.append(n_bootstrap % chunk_size)
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(groups) * len(chunks)))
+
+    cells = {}
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = {}
+        for i, (_, _, part) in enumerate(groups):
+            cells[i] = score_cells(part["_y"].to_numpy(), part["_score"].to_numpy(), threshold, resolution)
+            futures[i] = [
+                pool.submit(bootstrap_chunk, cells[i], n, next(seeds), threshold, fpr_target)
+                for n in chunks
+            ]
+
+        rows = []
+        for i, (kind, value, part) in enumerate(groups):
+            levels, idx, labels, counts = cells[i]
+            point = metrics_from_counts(*_scatter(levels, idx, labels, counts[None, :]),
+                                        levels, threshold, fpr_target)
+            samples = [f.result() for f in futures[i]]
+
+            row = {"group": kind, "value": value, "rows": len(part), "frauds": int(part["_y"].sum())}
+            for m in METRICS:
+                resampled = np.concatenate([s[m] for s in samples])
+                low, high = np.nanpercentile(resampled, [2.5, 97.5])
+                row[m] = [round(float(point[m][0]), 4), round(float(low), 4), round(float(high), 4)]
+            rows.append(row)
+
+    return {
+        "model_version": MODEL_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "threshold": threshold,
+        "fpr_target": fpr_target,
+        "n_bootstrap": n_bootstrap,
+        "metrics": METRICS,
+        "overall": rows[0] if rows and rows[0]["group"] == "overall" else None,
+        "by_month": [r for r in rows if r["group"] == "month"],
+        "by_segment": [r for r in rows if r["group"] not in ("overall", "month")],
+        **curves(df["_y"].to_numpy(), df["_score"].to_numpy(), threshold, resolution=resolution),
+    }
+
+
+def curves(y: np.ndarray, scores: np.ndarray, threshold: float, points: int = 100,
+           resolution: float = 1e-4) -> dict:
+    """
+    Downsampled ROC and precision-recall curves and the confusion matrix
+    at `threshold`, for plotting.
+    """
+    levels, idx, labels, counts = score_cells(y, scores, threshold, resolution)
+    pos, neg = _scatter(levels, idx, labels, counts[None, :])
+    pos, neg = pos[0][::-1], neg[0][::-1]
+
+    tp, fp = np.cumsum(pos), np.cumsum(neg)
+    tpr, fpr = tp / tp[-1], fp / fp[-1]
+    precision = tp / (tp + fp)
+
+    keep = np.unique(np.linspace(0, len(levels) - 1, points).astype(int))
+    flags = scores >= threshold
+    return {
+        "roc": {"fpr": [0.0] + fpr[keep].round(4).tolist(), "tpr": [0.0] + tpr[keep].round(4).tolist()},
+        "pr": {"recall": tpr[keep].round(4).tolist(), "precision": precision[keep].round(4).tolist()},
+        "confusion": [
+            [int((~flags & (y == 0)).sum()), int((flags & (y == 0)).sum())],
+            [int((~flags & (y == 1)).sum()), int((flags & (y == 1)).sum())],
+        ],
+    }
+
+
+if __name__ == "__main__":
+    from src.model import load_model
+    from src.features import add_interaction_features
+    from src.preprocessing import cast_categorical
+
+    model = load_model(MODEL_PATH)
+    data = pd.read_csv(DATA_PATH)
+    valid = cast_categorical(add_interaction_features(data[data["month"] > TRAIN_MAX_MONTH]),
+                             model.pandas_categorical)
+
+    report = evaluate(valid, model.predict(valid[FEATURES]))
+    with open(evaluation_report_path(MODEL_PATH), "w") as f:
+        json.dump(report, f)
+
+    table = pd.DataFrame([report["overall"]] + report["by_month"])
+    print(table.to_string(index=False))
@@ -4,6 +4,9 @@
 import numpy as np
 import pandas as pd
 
+# Derived from raw fields by add_interaction_features
+INTERACTION_FEATURES = ["income_per_age", "credit_utilization", "velocity_ratio", "avg_velocity_per_hour"]
+
 def add_interaction_features(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
 
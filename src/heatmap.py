@@ -0,0 +1,112 @@
+# src/heatmap.py
+
+import json
+import os
+import threading
+import numpy as np
+
+from src.config import HEATMAP_AMOUNT_BINS, HEATMAP_AMOUNT_EDGES
+
+HOURS = list(range(24))
+
+
+def amount_edges(values, bins: int = HEATMAP_AMOUNT_BINS) -> list:
+    """
+    Lower edges of up to `bins` amount rows at quantiles of `values`; the
+    first edge is the minimum. Repeated quantiles of discrete amounts merge.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    return np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[:-1])).round(2).tolist()
+
+
+def amount_ranges(edges: list) -> list:
+    labels = [f"${lo:,.0f}-{hi:,.0f}" for lo, hi in zip(edges[:-1], edges[1:])]
+    return labels + [f"${edges[-1]:,.0f}+"]
+
+
+def load_amount_edges(profile_path: str) -> list:
+    """
+    The amount edges stored in the model's reference profile, or the
+    configured fallback for profiles without them.
+    """
+    if os.path.exists(profile_path):
+        with open(profile_path) as f:
+            edges = json.load(f).get("heatmap_amount_edges")
+        if edges:
+            return edges
+    return list(HEATMAP_AMOUNT_EDGES)
+
+
+class FraudHeatmap:
+    """
+    Hour-of-day x amount grid of scored transactions and fraud flags.
+
+    Amount rows start at `edges` (taken from the training data); amounts
+    below the first edge count in the first row. Counts live in fixed-size
+    arrays, so memory and snapshot cost do not grow with traffic.
+    """
+
+    def __init__(self, edges: list = HEATMAP_AMOUNT_EDGES):
+        self.edges = np.asarray(edges, dtype=float)
+        self.amount_ranges = amount_ranges(list(edges))
+        self._shape = (len(self.amount_ranges), len(HOURS))
+        self._counts = np.zeros(self._shape, dtype=np.int64)
+        self._frauds = np.zeros(self._shape, dtype=np.int64)
+        self._lock = threading.Lock()
+        self._version = 0
+        self._cached = None
+
+    def update(self, hours, amounts, fraud_flags):
+        """
+        Add a batch of scored transactions to the grid.
+        """
+        hours = np.asarray(hours, dtype=np.int64) % 24
+        amounts = np.asarray(amounts, dtype=float)
+        flags = np.asarray(fraud_flags, dtype=np.int64)
+
+        rows = np.searchsorted(self.edges, amounts, side="right") - 1
+        rows = np.clip(rows, 0, len(self.amount_ranges) - 1)
+        cells = rows * len(HOURS) + hours
+
+        size = self._counts.size
+        counts = np.bincount(cells, minlength=size).reshape(self._shape)
+        frauds = np.bincount(cells, weights=flags, minlength=size)
+        frauds = frauds.astype(np.int64).reshape(self._shape)
+
+        with self._lock:
+            self._counts += counts
+            self._frauds += frauds
+            self._version += 1
+
+    def snapshot(self) -> dict:
+        """
+        Counts and fraud rates per cell, rebuilt only after new updates.
+        """
+        with self._lock:
+            if self._cached is not None and self._cached["version"] == self._version:
+                return self._cached
+            counts = self._counts.copy()
+            frauds = self._frauds.copy()
+            version = self._version
+
+        rates = np.divide(
+            frauds, counts,
+            out=np.zeros(self._shape, dtype=float),
+            where=counts > 0
+        )
+
+        snapshot = {
+            "version": version,
+            "hours": HOURS,
+            "amount_ranges": self.amount_ranges,
+            "total": int(counts.sum()),
+            "counts": counts.tolist(),
+            "fraud_counts": frauds.tolist(),
+            "fraud_rates": np.round(rates, 4).tolist(),
+        }
+
+        with self._lock:
+            if version == self._version:
+                self._cached = snapshot
+        return snapshot
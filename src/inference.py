@@ -1,6 +1,10 @@
 # logic-main/inference.py
 
+import os
+import threading
 import time
+from contextlib import contextmanager
+
 import pandas as pd
 import numpy as np
 
@@ -9,32 +13,246 @@ from src.config import (
     MODEL_PATH,
     MODEL_VERSION,
     FRAUD_THRESHOLD,
+    PREDICT_CORES,
+    PREDICT_MIN_THREAD_GAIN,
 )
 
 from src.model import load_model
 from src.features import add_interaction_features
 from src.preprocessing import cast_categorical
+from src.cascade import cascade_config_path, load_cascade, num_iterations, sigmoid
+from src.backends import (
+    encode_matrix,
+    load_backends,
+    load_calibration_sample,
+    onnx_model_path,
+    onnxruntime,
+    time_predict_ms,
+)
+
+
+class ExecutionPlanner:
+    """
+    Chooses the thread count and input style of every predict call from the
+    batch size and the number of predicts already running.
+
+    Calibration times each batch size single-threaded and on all cores, with
+    the DataFrame and with the pre-encoded matrix. Sizes where threads do
+    not pay off by `min_thread_gain` always run on one thread, so concurrent
+    small requests do not fight over cores in OpenMP regions; larger batches
+    get an equal share of the cores between the predicts in flight.
+    """
+
+    def __init__(self, cores: int, min_thread_gain: float = PREDICT_MIN_THREAD_GAIN):
+        self.cores = max(1, cores)
+        self.min_thread_gain = min_thread_gain
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.calls = {}
+
+        # Uncalibrated: single-row-style calls on one thread, large batches share cores
+        self.profile = [
+            {"max_rows": 256, "matrix": True, "threads_help": False, "timings_ms": {}},
+            {"max_rows": None, "matrix": True, "threads_help": True, "timings_ms": {}},
+        ]
+        self.calibrated = False
+
+    def calibrate(self, router, X: pd.DataFrame, batch_sizes=(1, 16, 256, 4096), rows_per_size: int = 4096):
+        profile = []
+        for size in batch_sizes:
+            batch = X.iloc[np.arange(size) % len(X)]
+            backend = router.backend_for(size)
+            repeats = max(3, min(50, rows_per_size // size))
+
+            timings = {}
+            for matrix in (False, True):
+                for threads in sorted({1, self.cores}):
+                    key = f"{'matrix' if matrix else 'dataframe'}/{threads}"
+                    timings[key] = round(time_predict_ms(backend, batch, repeats, num_threads=threads, matrix=matrix), 4)
+
+            matrix = timings["matrix/1"] <= timings["dataframe/1"]
+            style = "matrix" if matrix else "dataframe"
+            gain = timings[f"{style}/1"] / timings[f"{style}/{self.cores}"]
+            profile.append({
+                "max_rows": size,
+                "matrix": matrix,
+                "threads_help": bool(self.cores > 1 and gain >= self.min_thread_gain),
+                "timings_ms": timings,
+            })
+
+        profile[-1]["max_rows"] = None
+        self.profile = profile
+        self.calibrated = True
+        return self
+
+    def plan(self, rows: int, concurrency: int) -> tuple:
+        """
+        (num_threads, matrix) for a batch of `rows` among `concurrency` predicts.
+        """
+        entry = next(e for e in self.profile if e["max_rows"] is None or rows <= e["max_rows"])
+        threads = max(1, self.cores // max(1, concurrency)) if entry["threads_help"] else 1
+        return threads, entry["matrix"]
+
+    @contextmanager
+    def running(self, rows: int):
+        with self._lock:
+            self.in_flight += 1
+            concurrency = self.in_flight
+        threads, matrix = self.plan(rows, concurrency)
+        key = f"{'matrix' if matrix else 'dataframe'}/{threads}"
+        with self._lock:
+            self.calls[key] = self.calls.get(key, 0) + 1
+        try:
+            yield threads, matrix
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "cores": self.cores,
+                "calibrated": self.calibrated,
+                "in_flight": self.in_flight,
+                "profile": self.profile,
+                "calls": dict(self.calls),
+            }
+
+
+class ServedModel:
+    """
+    A booster with its early-exit cascade and scoring backends.
+
+    With `background`, scoring starts on native LightGBM and the ONNX
+    parity check and backend timing run on a separate thread, so a load on
+    the request path does not wait for them; `ready` is set once the routed
+    backends are in place. `calibrated` reuses an earlier (parity, plan).
+    """
+
+    def __init__(self, name: str, path: str, version: str, background: bool = False,
+                 calibrated: tuple = None):
+        self.name = name
+        self.path = path
+        self.version = version
+        self.model = load_model(path)
+
+        # Early-exit cascade, enabled when a calibration is stored with the model
+        self.cascade = load_cascade(cascade_config_path(path), self.model)
+
+        # Full-model scoring routed to the fastest backend for each batch size
+        self.sample = load_calibration_sample(self.model, path)
+        self.ready = threading.Event()
+        if background:
+            self.backend = load_backends(self.model, path)
+            threading.Thread(
+                target=self._load_backends, args=(calibrated,), name=f"backends-{name}", daemon=True
+            ).start()
+        else:
+            self._load_backends(calibrated)
+
+    def _load_backends(self, calibrated: tuple = None):
+        self.backend = load_backends(self.model, self.path, self.sample, calibrated)
+        self.ready.set()
+
+    def calibration(self) -> tuple:
+        """
+        The (parity, plan) to reuse when this file is loaded again, or None
+        while the backends are still being calibrated.
+        """
+        if not self.ready.is_set():
+            return None
+        return self.backend.parity, self.backend.plan
+
+    def size_bytes(self) -> int:
+        """
+        Approximate resident size: the booster's text dump, plus the ONNX
+        model when that backend can be loaded.
+        """
+        size = len(self.model.model_to_string())
+        path = onnx_model_path(self.path)
+        if onnxruntime is not None and self.sample is not None and os.path.exists(path):
+            size += os.path.getsize(path)
+        return size
+
+    def score_cascade(self, X: pd.DataFrame) -> tuple:
+        """
+        Score with the first K iterations and stop if the partial score is in
+        the calibrated safe band; otherwise add the remaining iterations.
+        """
+        model, k = self.model, self.cascade["k"]
+        with planner.running(len(X)) as (threads, matrix):
+            if matrix:
+                X = encode_matrix(X, model.pandas_categorical)
+            partial = model.predict(X, num_iteration=k, raw_score=True, num_threads=threads)[0]
+            if sigmoid(partial) < self.cascade["safe_below"]:
+                return float(sigmoid(partial)), "early_exit"
+
+            rest = model.predict(
+                X,
+                start_iteration=k,
+                num_iteration=num_iterations(model) - k,
+                raw_score=True,
+                num_threads=threads
+            )[0]
+        return float(sigmoid(partial + rest)), "full"
+
+    def score_full(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Full-ensemble scores with the planned threads and input style.
+        """
+        with planner.running(len(X)) as (threads, matrix):
+            return self.backend.predict(X, num_threads=threads, matrix=matrix)
+
+
+# Threads and input style are planned per call, shared by every model
+planner = ExecutionPlanner(PREDICT_CORES)
 
 # Load once at startup
-model = load_model(MODEL_PATH)
+default_model = ServedModel("default", MODEL_PATH, MODEL_VERSION)
+if default_model.sample is not None:
+    planner.calibrate(default_model.backend, default_model.sample)
+
+model = default_model.model
+cascade = default_model.cascade
+backend = default_model.backend
+
+def score_cascade(X: pd.DataFrame) -> tuple:
+    return default_model.score_cascade(X)
+
+def score_full(X: pd.DataFrame) -> np.ndarray:
+    return default_model.score_full(X)
 
-def predict_single(transaction: dict) -> dict:
+def predict_single(transaction: dict, served: ServedModel = None) -> dict:
     """
     Real-time fraud prediction (FastAPI)
     """
     start_time = time.time()
+    served = served or default_model
 
     df = pd.DataFrame([transaction])
     df = add_interaction_features(df)
     df = cast_categorical(df)
 
-    score = float(model.predict(df[FEATURES])[0])
+    if served.cascade is not None:
+        score, stage = served.score_cascade(df[FEATURES])
+    else:
+        score, stage = float(served.score_full(df[FEATURES])[0]), "full"
 
     latency_ms = round((time.time() - start_time) * 1000, 2)
 
     return {
-        "model_version": MODEL_VERSION,
+        "model_version": served.version,
         "risk_score": round(score, 4),
         "fraud_flag": int(score >= FRAUD_THRESHOLD),
+        "stage": stage,
         "latency_ms": latency_ms
     }
+
+def predict_batch(df: pd.DataFrame, served: ServedModel = None) -> np.ndarray:
+    """
+    Batch fraud scores for raw transactions (one model call)
+    """
+    served = served or default_model
+    df = add_interaction_features(df)
+    df = cast_categorical(df)
+    return served.score_full(df[FEATURES])
@@ -5,3 +5,27 @@ import pickle
 def load_model(path: str):
     with open(path, "rb") as f:
         return pickle.load(f)
+
+def save_model(model, path: str):
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+
+def get_lgbm_params(scale_pos_weight: float) -> dict:
+    return {
+        "objective": "binary",
+        "metric": "auc",
+        "boosting_type": "gbdt",
+        "learning_rate": 0.01,
+        "num_leaves": 31,
+        "max_depth": 6,
+        "min_data_in_leaf": 50,
+        "min_child_weight": 5,
+        "feature_fraction": 0.7,
+        "bagging_fraction": 0.7,
+        "bagging_freq": 5,
+        "lambda_l1": 0.1,
+        "lambda_l2": 0.1,
+        "scale_pos_weight": scale_pos_weight,
+        "verbosity": -1,
+        "seed": 42
+    }
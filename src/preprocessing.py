@@ -3,8 +3,21 @@
 import pandas as pd
 from src.config import CAT_COLS
 
-def cast_categorical(df: pd.DataFrame) -> pd.DataFrame:
+def cast_categorical(df: pd.DataFrame, categories: list = None) -> pd.DataFrame:
+    """
+    Cast CAT_COLS to pandas categories.
+
+    `categories` (e.g. a booster's `pandas_categorical`) pins the existing
+    category order so codes match an already trained model; unseen values
+    are appended after the known ones.
+    """
     df = df.copy()
-    for c in CAT_COLS:
-        df[c] = df[c].astype("category")
+    for i, c in enumerate(CAT_COLS):
+        if categories is None:
+            df[c] = df[c].astype("category")
+        else:
+            known = list(categories[i])
+            seen = set(known)
+            unseen = [v for v in pd.unique(df[c].dropna()) if v not in seen]
+            df[c] = pd.Categorical(df[c], categories=known + sorted(unseen))
     return df
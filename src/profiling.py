@@ -0,0 +1,214 @@
+# src/profiling.py
+
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+# Innermost Python frames of threads blocked in C: lock and condition
+# waits (queues, events), the event loop's select and idle executor workers
+IDLE_FRAMES = {
+    ("wait", "threading.py"),
+    ("_wait_for_tstate_lock", "threading.py"),
+    ("select", "selectors.py"),
+    ("_worker", "thread.py"),
+}
+
+
+def is_idle(frame) -> bool:
+    return (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename)) in IDLE_FRAMES
+
+
+def sample_stacks(seconds: float, interval: float) -> tuple:
+    """
+    Wall-clock sampling profile of every thread except the caller's.
+
+    Python cannot tell a running thread from one blocked in C, so stacks
+    whose innermost frame is in IDLE_FRAMES are counted as idle rather than
+    kept; threads in `time.sleep` or other blocking calls still appear.
+
+    Returns (Counter of folded stacks "thread;outer;...;inner", samples,
+    idle thread-samples).
+    """
+    names = {t.ident: t.name for t in threading.enumerate()}
+    own = threading.get_ident()
+    stacks = Counter()
+    samples = idle = 0
+
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if is_idle(frame):
+                idle += 1
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            thread = names.get(ident) or str(ident)
+            stacks[";".join([thread] + labels[::-1])] += 1
+        samples += 1
+        time.sleep(interval)
+    return stacks, samples, idle
+
+
+def process_memory() -> dict:
+    """
+    Current and peak resident set size in MB.
+    """
+    status = {}
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    status[key] = int(value.split()[0]) / 1024
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    return {
+        "rss_mb": round(status["VmRSS"], 1) if "VmRSS" in status else None,
+        "peak_rss_mb": round(status.get("VmHWM", peak_mb), 1),
+    }
+
+
+def model_footprint(model, model_path: str, extra_paths: list = ()) -> dict:
+    """
+    Size of the loaded booster (its text dump approximates the native
+    allocation) and of the model files on disk.
+    """
+    files = {
+        os.path.basename(p): round(os.path.getsize(p) / 1024, 1)
+        for p in [model_path, *extra_paths] if os.path.exists(p)
+    }
+    return {
+        "num_trees": model.num_trees(),
+        "model_text_kb": round(len(model.model_to_string()) / 1024, 1),
+        "files_kb": files,
+    }
+
+
+class Profiler:
+    """
+    On-demand CPU and allocation profiles of the serving process.
+
+    Nothing runs until a profile is requested: stack sampling and
+    tracemalloc are active only for the requested window. One profile runs
+    at a time; results are written to `directory` for download.
+    """
+
+    def __init__(self, directory: str, max_seconds: float = 60.0):
+        self.directory = directory
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+
+    def _path(self, kind: str, ext: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        return os.path.join(self.directory, f"{kind}-{stamp}.{ext}")
+
+    def _acquire(self):
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+
+    def cpu(self, seconds: float, interval_ms: float = 5.0, top: int = 20) -> dict:
+        """
+        Sample all threads' stacks by wall clock for `seconds`, leaving out
+        idle waits; writes folded stacks (flamegraph.pl, speedscope) and
+        returns the leaf frames seen most often.
+        """
+        self._acquire()
+        try:
+            stacks, samples, idle = sample_stacks(min(seconds, self.max_seconds), interval_ms / 1000)
+        finally:
+            self._lock.release()
+
+        path = self._path("cpu", "folded")
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        # Share of non-idle thread-samples
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = max(1, sum(leaves.values()))
+        return {
+            "clock": "wall",
+            "samples": samples,
+            "idle_share": round(idle / max(1, idle + sum(leaves.values())), 4),
+            "file": os.path.basename(path),
+            "top_frames": [
+                {"frame": frame, "share": round(count / total, 4)}
+                for frame, count in leaves.most_common(top)
+            ],
+        }
+
+    def memory(self, seconds: float, count_requests, frames: int = 10, top: int = 20) -> dict:
+        """
+        Trace allocations for `seconds`; writes the tracemalloc snapshot
+        (`tracemalloc.Snapshot.load`) and returns the sites holding the most
+        memory allocated in the window.
+
+        tracemalloc sees only blocks still alive, so `retained_kb` is memory
+        allocated in the window and held at its end (caches, queues, leaks),
+        not the total allocated; `peak_traced_kb` is the most held at once.
+        """
+        self._acquire()
+        try:
+            before = count_requests()
+            tracemalloc.start(frames)
+            try:
+                time.sleep(min(seconds, self.max_seconds))
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            requests = count_requests() - before
+        finally:
+            self._lock.release()
+
+        path = self._path("memory", "tracemalloc")
+        snapshot.dump(path)
+
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        stats = snapshot.statistics("lineno")
+        total = sum(s.size for s in stats)
+        return {
+            "requests": requests,
+            "retained_kb": round(total / 1024, 1),
+            "retained_kb_per_request": round(total / 1024 / requests, 2) if requests else None,
+            "peak_traced_kb": round(peak / 1024, 1),
+            "file": os.path.basename(path),
+            "top_allocations": [
+                {
+                    "location": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                    "size_kb": round(s.size / 1024, 1),
+                    "count": s.count,
+                }
+                for s in stats[:top]
+            ],
+        }
+
+    def file_path(self, name: str):
+        """
+        Path of a stored profile, or None if `name` is not one.
+        """
+        path = os.path.join(self.directory, os.path.basename(name))
+        return path if os.path.isfile(path) else None
@@ -0,0 +1,159 @@
+# src/registry.py
+
+import os
+import threading
+import time
+import warnings
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from src.inference import ServedModel, predict_single
+
+
+class UnknownModel(Exception):
+    pass
+
+
+class ModelUnavailable(Exception):
+    pass
+
+
+class ModelRegistry:
+    """
+    Named models loaded on first use and kept in an LRU bounded by
+    `max_bytes` of estimated model size.
+
+    After each load the least recently used unpinned models are evicted
+    until the cache fits again; models in `pinned` are loaded by `warm_up`
+    and never evicted. Metrics are kept per name, so they survive eviction.
+
+    Loads on the request path calibrate their backends in the background;
+    an evicted model's backend plan is kept and reused when the same file
+    is loaded again. Specs whose file is missing are reported at startup,
+    and a model that fails to load raises ModelUnavailable.
+    """
+
+    def __init__(self, specs: dict, max_bytes: int, pinned: list = (), latency_window: int = 1000):
+        self.specs = specs
+        self.max_bytes = max_bytes
+        self.pinned = set(pinned)
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in specs}
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._calibrated = {}
+
+        self.missing = [name for name, spec in specs.items() if not os.path.exists(spec["path"])]
+        if self.missing:
+            warnings.warn(f"Registry models without a file: {', '.join(self.missing)}")
+
+        self._stats = {
+            name: {
+                "requests": 0,
+                "flagged": 0,
+                "loads": 0,
+                "load_errors": 0,
+                "evictions": 0,
+                "load_seconds": 0.0,
+                "latencies": deque(maxlen=latency_window),
+            }
+            for name in specs
+        }
+
+    def warm_up(self):
+        for name in self.pinned:
+            self.get(name, background=False)
+        return self
+
+    def get(self, name: str, background: bool = True) -> ServedModel:
+        if name not in self.specs:
+            raise UnknownModel(f"Unknown model: {name}")
+
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                return self._models[name]
+
+        # Load outside the registry lock so other models keep serving; the
+        # per-name lock stops concurrent first requests loading twice
+        with self._load_locks[name]:
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    return self._models[name]
+
+            start = time.perf_counter()
+            spec = self.specs[name]
+            try:
+                mtime = os.path.getmtime(spec["path"])
+                calibrated = self._calibrated.get(name)
+                served = ServedModel(
+                    name, spec["path"], spec["version"], background=background,
+                    calibrated=calibrated[1] if calibrated and calibrated[0] == mtime else None,
+                )
+            except Exception as e:
+                with self._lock:
+                    self._stats[name]["load_errors"] += 1
+                raise ModelUnavailable(f"Model {name} could not be loaded: {e}") from e
+            size = served.size_bytes()
+
+            with self._lock:
+                stats = self._stats[name]
+                stats["loads"] += 1
+                stats["load_seconds"] += time.perf_counter() - start
+                self._models[name] = served
+                self._sizes[name] = size
+                self._evict(keep=name)
+            return served
+
+    def _evict(self, keep: str):
+        for name in list(self._models):
+            if sum(self._sizes.values()) <= self.max_bytes:
+                return
+            if name == keep or name in self.pinned:
+                continue
+            calibration = self._models[name].calibration()
+            if calibration is not None:
+                self._calibrated[name] = (os.path.getmtime(self._models[name].path), calibration)
+            del self._models[name]
+            del self._sizes[name]
+            self._stats[name]["evictions"] += 1
+
+    def predict(self, name: str, transaction: dict) -> dict:
+        served = self.get(name)
+        result = predict_single(transaction, served)
+        with self._lock:
+            stats = self._stats[name]
+            stats["requests"] += 1
+            stats["flagged"] += result["fraud_flag"]
+            stats["latencies"].append(result["latency_ms"])
+        return result
+
+    def report(self) -> dict:
+        with self._lock:
+            models = {}
+            for name, spec in self.specs.items():
+                stats = self._stats[name]
+                latencies = np.array(stats["latencies"])
+                models[name] = {
+                    "version": spec["version"],
+                    "loaded": name in self._models,
+                    "file_missing": name in self.missing,
+                    "pinned": name in self.pinned,
+                    "size_mb": round(self._sizes[name] / 1024 / 1024, 2) if name in self._sizes else None,
+                    "requests": stats["requests"],
+                    "flag_rate": round(stats["flagged"] / stats["requests"], 4) if stats["requests"] else None,
+                    "p50_ms": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+                    "p99_ms": round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None,
+                    "loads": stats["loads"],
+                    "load_errors": stats["load_errors"],
+                    "evictions": stats["evictions"],
+                    "load_seconds": round(stats["load_seconds"], 3),
+                }
+            return {
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "used_mb": round(sum(self._sizes.values()) / 1024 / 1024, 2),
+                "lru_order": list(self._models),
+                "models": models,
+            }
@@ -0,0 +1,177 @@
+# src/review.py
+
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class IndexedHeap:
+    """
+    Binary min-heap of (key, item_id) with the position of every item, so
+    any item can be removed in O(log n), not only the root.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._pos = {}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, item_id):
+        return item_id in self._pos
+
+    def peek(self) -> tuple:
+        return self._heap[0]
+
+    def push(self, item_id, key):
+        self._heap.append((key, item_id))
+        self._pos[item_id] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+    def pop(self) -> tuple:
+        key, item_id = self._heap[0]
+        self.remove(item_id)
+        return key, item_id
+
+    def remove(self, item_id):
+        i = self._pos.pop(item_id)
+        last = self._heap.pop()
+        if i < len(self._heap):
+            self._heap[i] = last
+            self._pos[last[1]] = i
+            self._sift_up(i)
+            self._sift_down(self._pos[last[1]])
+
+    def _swap(self, i: int, j: int):
+        heap = self._heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self._pos[heap[i][1]] = i
+        self._pos[heap[j][1]] = j
+
+    def _sift_up(self, i: int):
+        while i > 0:
+            parent = (i - 1) // 2
+            if self._heap[i] >= self._heap[parent]:
+                return
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i: int):
+        n = len(self._heap)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and self._heap[child] < self._heap[smallest]:
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+
+class ReviewQueue:
+    """
+    The `capacity` highest-risk unreviewed transactions, for analysts to
+    work riskiest first.
+
+    Items sit in two indexed heaps: by risk score, whose root is the
+    lowest-risk item and is evicted when a riskier one arrives at capacity,
+    and by arrival time, whose root expires first after `ttl_seconds`.
+    Insert, acknowledge and each expiry cost O(log capacity); listing the
+    top k sorts the held items only, never the scoring history.
+    """
+
+    def __init__(self, capacity: int, ttl_seconds: float):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        self._items = {}
+        self._by_score = IndexedHeap()
+        self._by_time = IndexedHeap()
+        self._next_id = 0
+
+        self.added = 0
+        self.skipped = 0
+        self.evicted = 0
+        self.expired = 0
+        self.acknowledged = 0
+
+    def add(self, transaction: dict, result: dict, timestamp: float = None):
+        """
+        Queue a scored transaction. Returns its review id, or None when the
+        queue is full of riskier items.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        score = result["risk_score"]
+        with self._lock:
+            self._expire(timestamp)
+            if len(self._items) >= self.capacity:
+                if score <= self._by_score.peek()[0]:
+                    self.skipped += 1
+                    return None
+                _, lowest = self._by_score.pop()
+                self._by_time.remove(lowest)
+                del self._items[lowest]
+                self.evicted += 1
+
+            review_id = self._next_id
+            self._next_id += 1
+            self._items[review_id] = {
+                "review_id": review_id,
+                "queued_at": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds"),
+                "model_version": result["model_version"],
+                "risk_score": score,
+                "fraud_flag": result["fraud_flag"],
+                "transaction": transaction,
+            }
+            self._by_score.push(review_id, score)
+            self._by_time.push(review_id, timestamp)
+            self.added += 1
+        return review_id
+
+    def acknowledge(self, review_id: int) -> dict:
+        """
+        Remove a reviewed item. Raises KeyError when it is not pending.
+        """
+        with self._lock:
+            self._expire(time.time())
+            item = self._items.pop(review_id)
+            self._by_score.remove(review_id)
+            self._by_time.remove(review_id)
+            self.acknowledged += 1
+        return item
+
+    def _expire(self, now: float):
+        cutoff = now - self.ttl_seconds
+        while self._by_time and self._by_time.peek()[0] < cutoff:
+            _, review_id = self._by_time.pop()
+            self._by_score.remove(review_id)
+            del self._items[review_id]
+            self.expired += 1
+
+    def top(self, k: int) -> list:
+        """
+        The k riskiest pending items, riskiest first.
+        """
+        with self._lock:
+            self._expire(time.time())
+            return heapq.nlargest(k, self._items.values(), key=lambda item: (item["risk_score"], -item["review_id"]))
+
+    def report(self, k: int = 20) -> dict:
+        items = self.top(k)
+        with self._lock:
+            return {
+                "pending": len(self._items),
+                "capacity": self.capacity,
+                "ttl_seconds": self.ttl_seconds,
+                "lowest_held_score": self._by_score.peek()[0] if self._by_score else None,
+                "added": self.added,
+                "skipped": self.skipped,
+                "evicted": self.evicted,
+                "expired": self.expired,
+                "acknowledged": self.acknowledged,
+                "items": items,
+            }
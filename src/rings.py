@@ -0,0 +1,288 @@
+# src/rings.py
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+def identifier_keys(identifiers: dict) -> list:
+    """
+    Hashed (kind, value) keys for the identifiers that are present, so raw
+    emails, phones and addresses are never held in memory or on disk.
+    """
+    keys = []
+    for kind, value in identifiers.items():
+        if value is None or str(value).strip() == "":
+            continue
+        digest = hashlib.blake2b(f"{kind}:{str(value).strip().lower()}".encode(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little"))
+    return keys
+
+
+class _Forest:
+    """
+    Union-find over applications (union by size, path halving). Each root
+    holds the live application and fraud counts of its component; removed
+    applications stay in the forest as tombstones until it is rebuilt.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}          # root -> live applications in the component
+        self.fraud = {}         # root -> live fraudulent applications in the component
+        self.owner = {}         # identifier key -> an application holding it
+        self.tombstones = 0
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> int:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size.pop(b)
+        self.fraud[a] += self.fraud.pop(b)
+        return a
+
+    def insert(self, app_id: int, keys: list, fraud: bool):
+        self.parent[app_id] = app_id
+        self.size[app_id] = 1
+        self.fraud[app_id] = int(fraud)
+        for key in keys:
+            owner = self.owner.setdefault(key, app_id)
+            if owner != app_id:
+                self.union(owner, app_id)
+
+    def remove(self, app_id: int, fraud: bool):
+        root = self.find(app_id)
+        self.size[root] -= 1
+        self.fraud[root] -= int(fraud)
+        self.tombstones += 1
+
+
+class RingIndex:
+    """
+    Applications linked by shared device, email, phone or address.
+
+    Connected components are kept with union-find, each root holding its
+    live application and fraud counts, so ring lookups cost O(alpha(n)) per
+    identifier. Expiry is incremental: every add drops the applications
+    older than `ttl_seconds` (and the oldest beyond `max_applications`), and
+    each drop only decrements the counts of its ring, so steady traffic
+    pays O(alpha(n)) per request for it.
+
+    Union-find cannot split, so dropped applications keep linking their
+    rings as tombstones. Once tombstones exceed `compact_fraction` of the
+    live applications, a background thread rebuilds the forest from the
+    survivors, catches up on what changed meanwhile and swaps it in.
+    """
+
+    def __init__(self, ttl_seconds: float, max_applications: int, compact_fraction: float = 0.2,
+                 catch_up_rows: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_applications = max_applications
+        self.compact_fraction = compact_fraction
+        self.catch_up_rows = catch_up_rows
+        self._lock = threading.Lock()
+
+        self._apps = deque()    # (app_id, timestamp, keys, fraud) in arrival order
+        self._forest = _Forest()
+        self._next_id = 0
+        self._compacting = False
+        self._added_while_compacting = []
+        self._saver = None
+
+        self.expired = 0
+        self.evicted = 0
+        self.rebuilds = 0
+        self.saves = 0
+
+    def add(self, identifiers: dict, fraud: bool, timestamp: float = None) -> int:
+        """
+        Link a scored application to every ring sharing one of its identifiers.
+        """
+        keys = identifier_keys(identifiers)
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            app_id = self._next_id
+            self._next_id += 1
+            app = (app_id, timestamp, keys, bool(fraud))
+            self._apps.append(app)
+            self._forest.insert(app_id, keys, fraud)
+            if self._compacting:
+                self._added_while_compacting.append(app)
+            self._expire(timestamp)
+        return app_id
+
+    def lookup(self, identifiers: dict) -> dict:
+        """
+        Size and fraud rate of the ring an application with these identifiers
+        would join (the union of every ring it touches).
+        """
+        with self._lock:
+            self._expire(time.time())
+            forest = self._forest
+            roots = {
+                forest.find(forest.owner[key])
+                for key in identifier_keys(identifiers)
+                if key in forest.owner
+            }
+            size = sum(forest.size[r] for r in roots)
+            fraud = sum(forest.fraud[r] for r in roots)
+        return {
+            "ring_size": size,
+            "ring_fraud_rate": round(fraud / size, 4) if size else None,
+        }
+
+    def sweep(self, now: float = None):
+        with self._lock:
+            self._expire(time.time() if now is None else now)
+
+    def _expire(self, now: float):
+        cutoff = now - self.ttl_seconds
+        while self._apps and self._apps[0][1] < cutoff:
+            app_id, _, _, fraud = self._apps.popleft()
+            self._forest.remove(app_id, fraud)
+            self.expired += 1
+
+        while len(self._apps) > self.max_applications:
+            app_id, _, _, fraud = self._apps.popleft()
+            self._forest.remove(app_id, fraud)
+            self.evicted += 1
+
+        if not self._compacting and self._forest.tombstones > self.compact_fraction * max(1, len(self._apps)):
+            self._compacting = True
+            threading.Thread(target=self.compact, name="ring-compaction", daemon=True).start()
+
+    def compact(self):
+        """
+        Rebuild the forest from the live applications without holding the
+        lock, then swap it in.
+
+        Applications added during the rebuild are inserted in catch-up
+        rounds, also outside the lock, until fewer than `catch_up_rows`
+        remain for the final swap. Drops always take the oldest
+        applications, so those dropped meanwhile are a prefix of what was
+        inserted, and become tombstones in the new forest.
+        """
+        with self._lock:
+            self._compacting = True
+            self._added_while_compacting = []
+            inserted = list(self._apps)
+
+        forest = _Forest()
+        for app_id, _, keys, fraud in inserted:
+            forest.insert(app_id, keys, fraud)
+
+        dropped = 0
+        while True:
+            with self._lock:
+                first = self._apps[0][0] if self._apps else self._next_id
+                added, self._added_while_compacting = self._added_while_compacting, []
+                if len(added) < self.catch_up_rows:
+                    self._catch_up(forest, inserted, dropped, added, first)
+                    old, self._forest = self._forest, forest
+                    self._compacting = False
+                    self.rebuilds += 1
+                    break
+            dropped = self._catch_up(forest, inserted, dropped, added, first)
+
+        # Freeing millions of entries takes a while; not under the lock
+        del old
+
+    @staticmethod
+    def _catch_up(forest: _Forest, inserted: list, dropped: int, added: list, first: int) -> int:
+        """
+        Insert `added` into `forest`, then turn every application below the
+        oldest live id `first` into a tombstone. Returns how many of
+        `inserted` (in id order) have been dropped so far.
+        """
+        for app_id, _, keys, fraud in added:
+            forest.insert(app_id, keys, fraud)
+        inserted.extend(added)
+        while dropped < len(inserted) and inserted[dropped][0] < first:
+            forest.remove(inserted[dropped][0], inserted[dropped][3])
+            dropped += 1
+        return dropped
+
+    def save(self, path: str):
+        """
+        Write the live applications (hashed keys only) as gzip JSON.
+        """
+        with self._lock:
+            next_id, apps = self._next_id, list(self._apps)
+        state = {"next_id": next_id, "apps": [[app_id, ts, keys, fraud] for app_id, ts, keys, fraud in apps]}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+        self.saves += 1
+
+    def autosave(self, path: str, interval_seconds: float):
+        """
+        Save to `path` every `interval_seconds` from a background thread, so
+        a crash loses at most one interval of applications.
+        """
+        def run():
+            while True:
+                time.sleep(interval_seconds)
+                self.save(path)
+
+        if self._saver is None:
+            self._saver = threading.Thread(target=run, name="ring-autosave", daemon=True)
+            self._saver.start()
+        return self
+
+    def load(self, path: str):
+        """
+        Restore applications saved by `save`, dropping any that have expired.
+        """
+        if not os.path.exists(path):
+            return self
+        with gzip.open(path, "rt") as f:
+            state = json.load(f)
+        with self._lock:
+            self._next_id = state["next_id"]
+            self._apps = deque((app_id, ts, keys, fraud) for app_id, ts, keys, fraud in state["apps"])
+            cutoff = time.time() - self.ttl_seconds
+            while self._apps and (self._apps[0][1] < cutoff or len(self._apps) > self.max_applications):
+                self._apps.popleft()
+                self.expired += 1
+            self._forest = _Forest()
+            for app_id, _, keys, fraud in self._apps:
+                self._forest.insert(app_id, keys, fraud)
+        return self
+
+    def report(self, top: int = 10) -> dict:
+        with self._lock:
+            forest = self._forest
+            live = [(root, size) for root, size in forest.size.items() if size > 0]
+            largest = sorted(live, key=lambda item: item[1], reverse=True)[:top]
+            return {
+                "applications": len(self._apps),
+                "identifiers": len(forest.owner),
+                "rings": len(live),
+                "largest_rings": [
+                    {"ring_size": size, "ring_fraud_rate": round(forest.fraud[root] / size, 4)}
+                    for root, size in largest
+                ],
+                "ttl_seconds": self.ttl_seconds,
+                "max_applications": self.max_applications,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "tombstones": forest.tombstones,
+                "rebuilds": self.rebuilds,
+                "saves": self.saves,
+            }
@@ -0,0 +1,151 @@
+# src/shadow.py
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.config import FEATURES, FRAUD_THRESHOLD, MODEL_VERSION
+from src.features import add_interaction_features
+from src.model import load_model
+from src.preprocessing import cast_categorical
+
+
+class ShadowScorer:
+    """
+    Scores a sampled share of live requests with challenger models.
+
+    The request path only samples and enqueues; a background thread scores
+    queued requests in batches and appends score pairs to an NDJSON file.
+    When the queue is full the request is dropped from shadow scoring, so
+    the primary response never waits on challengers. Requests queued
+    without a primary score (early exits, whose score is partial) get their
+    full-model score from `rescore`, which takes raw transactions.
+    """
+
+    def __init__(self, challengers: dict, log_path: str, sample_rate: float = 0.1,
+                 max_queue: int = 1000, batch_size: int = 256, rescore=None):
+        self.challengers = challengers
+        self.rescore = rescore
+        self.log_path = log_path
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.sampled = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self._stats = {
+            name: {"scored": 0, "abs_diff": 0.0, "flag_disagreements": 0}
+            for name in challengers
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+            self._thread.start()
+        return self
+
+    def observe(self, transaction: dict, score: float = None):
+        """
+        Queue a scored request for the challengers if it is sampled.
+        """
+        if random.random() >= self.sample_rate:
+            return
+        try:
+            self._queue.put_nowait((time.time(), transaction, score))
+            self.sampled += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # A bad batch is counted and skipped; it must not stop the worker
+            try:
+                self.score_batch(batch)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = repr(e)
+                warnings.warn(f"Shadow scorer skipped a batch of {len(batch)}: {e!r}")
+
+    def score_batch(self, batch: list):
+        raw = pd.DataFrame([transaction for _, transaction, _ in batch])
+        df = cast_categorical(add_interaction_features(raw))
+
+        primary = np.array([score for _, _, score in batch], dtype=float)
+        missing = np.isnan(primary)
+        if missing.any() and self.rescore is not None:
+            primary[missing] = self.rescore(raw[missing])
+        keep = ~np.isnan(primary)
+        # One thread, so challengers never compete with primary scoring for cores
+        shadow = {name: model.predict(df[FEATURES], num_threads=1) for name, model in self.challengers.items()}
+
+        with self._lock:
+            for name, scores in shadow.items():
+                stats = self._stats[name]
+                scores, compared = scores[keep], primary[keep]
+                stats["scored"] += len(scores)
+                stats["abs_diff"] += float(np.abs(scores - compared).sum())
+                stats["flag_disagreements"] += int(
+                    ((scores >= FRAUD_THRESHOLD) != (compared >= FRAUD_THRESHOLD)).sum()
+                )
+
+        with open(self.log_path, "a") as f:
+            for i, (timestamp, _, _) in enumerate(batch):
+                if not keep[i]:
+                    continue
+                f.write(json.dumps({
+                    "timestamp": timestamp,
+                    "model_version": MODEL_VERSION,
+                    "risk_score": round(float(primary[i]), 4),
+                    "shadow": {name: round(float(s[i]), 4) for name, s in shadow.items()},
+                }) + "\n")
+
+    def report(self) -> dict:
+        with self._lock:
+            challengers = {
+                name: {
+                    "scored": s["scored"],
+                    "mean_abs_diff": round(s["abs_diff"] / s["scored"], 4) if s["scored"] else None,
+                    "flag_disagreement_rate": round(s["flag_disagreements"] / s["scored"], 4) if s["scored"] else None,
+                }
+                for name, s in self._stats.items()
+            }
+        return {
+            "sample_rate": self.sample_rate,
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "pending": self._queue.qsize(),
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "thread_alive": self._thread is not None and self._thread.is_alive(),
+            "log_path": self.log_path,
+            "challengers": challengers,
+        }
+
+
+def load_shadow_scorer(paths: dict, log_path: str, sample_rate: float, rescore=None):
+    """
+    Start a scorer for the configured challengers that exist on disk, or
+    None if there are none.
+    """
+    challengers = {name: load_model(path) for name, path in paths.items() if os.path.exists(path)}
+    if not challengers:
+        return None
+    os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+    return ShadowScorer(challengers, log_path, sample_rate, rescore=rescore).start()
@@ -1,13 +1,69 @@
 # logic-main/train.py
 
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
 import lightgbm as lgb
-from src.config import FEATURES, TARGET
-from model import get_lgbm_params, save_model
+from sklearn.metrics import roc_auc_score
+from src.config import (
+    FEATURES, TARGET, BEST_PARAMS_PATH, MODEL_PATH, TRAIN_MAX_MONTH,
+    NEGATIVE_SAMPLE_RATE, RANDOM_STATE,
+)
+from src.model import get_lgbm_params, save_model, load_model
 from src.features import add_interaction_features
 from src.config import CAT_COLS
 from src.preprocessing import cast_categorical
+from src.drift import build_reference_profile, reference_profile_path, save_profile
+from src.tuning import load_tuned_params
+from src.chunked import SpooledSequence, load_labels, scan_sources, spool_sources
+from src.profiling import process_memory
+from src.cascade import cascade_config_path
+from src.backends import calibration_sample_path, onnx_model_path
+from src.evaluation import evaluation_report_path
+
+def training_log_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + "_training.json"
+
+def _load_training_log(model_path: str):
+    path = training_log_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def _save_training_log(log: dict, model_path: str):
+    with open(training_log_path(model_path), "w") as f:
+        json.dump(log, f, indent=2)
+
+def _remove_stale_sidecars(model_path: str):
+    # Calibrated for the trees that were just replaced; the serving path
+    # would otherwise load them against the new booster
+    for path in (cascade_config_path(model_path), onnx_model_path(model_path),
+                 calibration_sample_path(model_path), evaluation_report_path(model_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _training_params(y_train, params_path):
+    scale_pos_weight = (y_train == 0).sum() / (y_train == 1).sum()
+
+    params = get_lgbm_params(scale_pos_weight)
+    num_boost_round = 5000
 
-def train_model(train_df, valid_df, model_path):
+    # Use the output of src/tuning.py when a search has been run
+    tuned = load_tuned_params(params_path)
+    if tuned is not None:
+        params.update(tuned["params"])
+        num_boost_round = tuned["num_boost_round"]
+
+    return params, num_boost_round
+
+def train_model(train_df, valid_df, model_path, params_path=BEST_PARAMS_PATH):
+
+    start_time = time.time()
 
     train_df = add_interaction_features(train_df)
     valid_df = add_interaction_features(valid_df)
@@ -21,9 +77,7 @@ def train_model(train_df, valid_df, model_path):
     X_valid = valid_df[FEATURES]
     y_valid = valid_df[TARGET]
 
-    scale_pos_weight = (y_train == 0).sum() / (y_train == 1).sum()
-
-    params = get_lgbm_params(scale_pos_weight)
+    params, num_boost_round = _training_params(y_train, params_path)
 
     lgb_train = lgb.Dataset(X_train, y_train, categorical_feature=CAT_COLS)
     lgb_valid = lgb.Dataset(X_valid, y_valid, categorical_feature=CAT_COLS)
@@ -32,7 +86,7 @@ def train_model(train_df, valid_df, model_path):
         params,
         lgb_train,
         valid_sets=[lgb_valid],
-        num_boost_round=5000,
+        num_boost_round=num_boost_round,
         callbacks=[
             lgb.early_stopping(stopping_rounds=200),
             lgb.log_evaluation(period=100)
@@ -40,4 +94,253 @@ def train_model(train_df, valid_df, model_path):
     )
 
     save_model(model, model_path)
+    _remove_stale_sidecars(model_path)
+
+    # Reference distribution for drift monitoring, stored with the model
+    profile = build_reference_profile(train_df, model.predict(X_train))
+    save_profile(profile, reference_profile_path(model_path))
+
+    _save_training_log({
+        "mode": "full",
+        "seconds": round(time.time() - start_time, 2),
+        "rows": len(train_df),
+        "num_trees": model.num_trees(),
+        "valid_auc": round(roc_auc_score(y_valid, model.predict(X_valid)), 5),
+    }, model_path)
+
+    return model
+
+def train_incremental(new_df, valid_df, model_path, base_model_path=MODEL_PATH,
+                      history_df=None, num_boost_round=500, max_auc_drop=0.002,
+                      params_path=BEST_PARAMS_PATH):
+    """
+    Continue boosting the production model on newly arrived months only.
+
+    The continued model is kept if its validation AUC is within
+    `max_auc_drop` of the base model's; otherwise it falls back to a full
+    `train_model` on `history_df` (all months), or keeps the base model when
+    no history is given. Returns a report with validation AUCs and wall times.
+
+    A kept model gets a drift reference rebuilt from its own scores, and
+    the cascade, ONNX, calibration-sample and evaluation files of the
+    replaced model are removed.
+    """
+    start_time = time.time()
+
+    base = load_model(base_model_path)
+
+    new = cast_categorical(add_interaction_features(new_df), base.pandas_categorical)
+    valid = cast_categorical(add_interaction_features(valid_df))
+
+    X_new, y_new = new[FEATURES], new[TARGET]
+    X_valid, y_valid = valid[FEATURES], valid[TARGET]
+
+    base_auc = roc_auc_score(y_valid, base.predict(X_valid))
+
+    params, _ = _training_params(y_new, params_path)
+
+    model = lgb.train(
+        params,
+        lgb.Dataset(X_new, y_new, categorical_feature=CAT_COLS),
+        init_model=base,
+        valid_sets=[lgb.Dataset(X_valid, y_valid, categorical_feature=CAT_COLS)],
+        num_boost_round=num_boost_round,
+        callbacks=[
+            lgb.early_stopping(stopping_rounds=50),
+            lgb.log_evaluation(period=100)
+        ]
+    )
+
+    incremental_auc = roc_auc_score(y_valid, model.predict(X_valid))
+    incremental_seconds = round(time.time() - start_time, 2)
+
+    report = {
+        "base_auc": round(base_auc, 5),
+        "incremental_auc": round(incremental_auc, 5),
+        "incremental_seconds": incremental_seconds,
+        "rows": len(new),
+        "added_trees": model.num_trees() - base.num_trees(),
+    }
+
+    if incremental_auc >= base_auc - max_auc_drop:
+        save_model(model, model_path)
+        _remove_stale_sidecars(model_path)
+
+        # The continued booster scores differently, so its drift reference is
+        # rebuilt: over all months when they are given, else the new months
+        if history_df is not None:
+            reference = cast_categorical(add_interaction_features(history_df), base.pandas_categorical)
+        else:
+            reference = new
+        profile = build_reference_profile(reference, model.predict(reference[FEATURES]))
+        save_profile(profile, reference_profile_path(model_path))
+
+        # Savings are measured against the last full retrain of the base model
+        base_log = _load_training_log(base_model_path) or {}
+        full_seconds = base_log.get("seconds") if base_log.get("mode") == "full" else base_log.get("full_seconds")
+        if full_seconds is not None:
+            report["full_seconds"] = full_seconds
+            report["seconds_saved"] = round(full_seconds - incremental_seconds, 2)
+
+        report["mode"] = "incremental"
+        _save_training_log(dict(report, seconds=incremental_seconds), model_path)
+        return model, report
+
+    if history_df is None:
+        report["mode"] = "rejected"
+        return base, report
+
+    model = train_model(history_df, valid_df, model_path, params_path)
+    full_log = _load_training_log(model_path)
+    report.update(
+        mode="full",
+        full_auc=full_log["valid_auc"],
+        full_seconds=full_log["seconds"],
+        # The incremental attempt saved nothing; both trainings were paid for
+        seconds_saved=None,
+        total_seconds=round(incremental_seconds + full_log["seconds"], 2),
+    )
+    return model, report
+
+def _shift_raw_score(model, delta):
+    # Every row lands in exactly one leaf of the first tree
+    num_leaves = model.dump_model(num_iteration=1)["tree_info"][0]["num_leaves"]
+    for leaf in range(num_leaves):
+        model.set_leaf_output(0, leaf, model.get_leaf_output(0, leaf) + delta)
+
+def train_model_downsampled(train_df, valid_df, model_path, negative_rate=NEGATIVE_SAMPLE_RATE,
+                            correction="weights", params_path=BEST_PARAMS_PATH, seed=RANDOM_STATE):
+    """
+    Train on all fraud rows and a `negative_rate` random share of the rest.
+
+    `scale_pos_weight` still comes from the full training months, and the
+    sampling is corrected so scores stay on the scale of `train_model` (and
+    FRAUD_THRESHOLD keeps its meaning):
+      "weights": kept negatives get weight 1 / negative_rate
+      "logit":   negatives are unweighted and log(negative_rate) is added to
+                 the raw score, baked into the first tree's leaves
+    """
+    if correction not in ("weights", "logit"):
+        raise ValueError(f"Unknown correction: {correction}")
+
+    start_time = time.time()
+
+    train_df = cast_categorical(add_interaction_features(train_df))
+    valid_df = cast_categorical(add_interaction_features(valid_df))
+
+    y_full = train_df[TARGET]
+    params, num_boost_round = _training_params(y_full, params_path)
+
+    rng = np.random.default_rng(seed)
+    keep = (y_full == 1).to_numpy() | (rng.random(len(train_df)) < negative_rate)
+    sample = train_df[keep]
+
+    weight = None
+    if correction == "weights":
+        weight = np.where(sample[TARGET] == 1, 1.0, 1.0 / negative_rate)
+
+    model = lgb.train(
+        params,
+        lgb.Dataset(sample[FEATURES], sample[TARGET], weight=weight, categorical_feature=CAT_COLS),
+        valid_sets=[lgb.Dataset(valid_df[FEATURES], valid_df[TARGET], categorical_feature=CAT_COLS)],
+        num_boost_round=num_boost_round,
+        callbacks=[
+            lgb.early_stopping(stopping_rounds=200),
+            lgb.log_evaluation(period=100)
+        ]
+    )
+    if correction == "logit":
+        _shift_raw_score(model, np.log(negative_rate))
+    seconds = round(time.time() - start_time, 2)
+
+    save_model(model, model_path)
+    _remove_stale_sidecars(model_path)
+
+    profile = build_reference_profile(train_df, model.predict(train_df[FEATURES]))
+    save_profile(profile, reference_profile_path(model_path))
+
+    _save_training_log({
+        "mode": "downsampled",
+        "negative_rate": negative_rate,
+        "correction": correction,
+        "seconds": seconds,
+        "rows": len(sample),
+        "full_rows": len(train_df),
+        "num_trees": model.num_trees(),
+        "valid_auc": round(roc_auc_score(valid_df[TARGET], model.predict(valid_df[FEATURES])), 5),
+    }, model_path)
+
+    return model
+
+def train_model_out_of_core(paths, model_path, params_path=BEST_PARAMS_PATH,
+                            train_max_month=TRAIN_MAX_MONTH, chunksize=200_000,
+                            batch_size=65_536, profile_rows=200_000, work_dir=None):
+    """
+    Train on CSV sources too large to load at once.
+
+    The sources are read twice in chunks: once for categories and label
+    counts, once to add the interaction features, encode each chunk and
+    spool it to disk as float32. LightGBM then bins the spooled rows through
+    `SpooledSequence`, so peak memory is bounded by `chunksize`, the
+    Sequence batch and LightGBM's bin storage rather than the raw data.
+    The booster gets the scanned categories as `pandas_categorical` and
+    scores DataFrames like a model from `train_model`.
+    """
+    start_time = time.time()
+
+    scan = scan_sources(paths, chunksize, train_max_month)
+    categories = scan["categories"]
+    sample_fraction = min(1.0, profile_rows / max(1, scan["rows"]["train"]))
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        spooled = spool_sources(paths, chunksize, train_max_month, categories, tmp, sample_fraction)
+        (train_x, train_y, train_rows), (valid_x, valid_y, valid_rows) = (
+            spooled["spools"]["train"], spooled["spools"]["valid"]
+        )
+
+        y_train = load_labels(train_y, train_rows)
+        y_valid = np.array(load_labels(valid_y, valid_rows))
+        params, num_boost_round = _training_params(y_train, params_path)
+
+        lgb_train = lgb.Dataset(
+            SpooledSequence(train_x, train_rows, batch_size),
+            label=y_train,
+            feature_name=FEATURES,
+            categorical_feature=CAT_COLS,
+        )
+        valid_seq = SpooledSequence(valid_x, valid_rows, batch_size)
+        lgb_valid = lgb.Dataset(valid_seq, label=y_valid, reference=lgb_train)
+
+        model = lgb.train(
+            params,
+            lgb_train,
+            valid_sets=[lgb_valid],
+            num_boost_round=num_boost_round,
+            callbacks=[
+                lgb.early_stopping(stopping_rounds=200),
+                lgb.log_evaluation(period=100)
+            ]
+        )
+        model.pandas_categorical = categories
+
+        valid_scores = np.concatenate([
+            model.predict(valid_seq[i:i + batch_size]) for i in range(0, valid_rows, batch_size)
+        ])
+
+    save_model(model, model_path)
+    _remove_stale_sidecars(model_path)
+
+    sample = cast_categorical(spooled["sample"], categories)
+    profile = build_reference_profile(sample, model.predict(sample[FEATURES]))
+    save_profile(profile, reference_profile_path(model_path))
+
+    _save_training_log({
+        "mode": "out_of_core",
+        "seconds": round(time.time() - start_time, 2),
+        "rows": train_rows,
+        "num_trees": model.num_trees(),
+        "valid_auc": round(roc_auc_score(y_valid, valid_scores), 5),
+        "peak_rss_mb": process_memory()["peak_rss_mb"],
+    }, model_path)
+
     return model
@@ -0,0 +1,206 @@
+# src/tuning.py
+
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    FEATURES,
+    TARGET,
+    CAT_COLS,
+    RANDOM_STATE,
+    DATA_PATH,
+    TRAIN_MAX_MONTH,
+    BEST_PARAMS_PATH,
+)
+from src.features import add_interaction_features
+from src.model import get_lgbm_params
+from src.preprocessing import cast_categorical
+
+# Binning is fixed once the shared dataset is built, so only booster
+# parameters are searched. feature_pre_filter must be off for
+# min_data_in_leaf to vary across trials on the same bins.
+DATASET_PARAMS = {"feature_pre_filter": False, "verbosity": -1}
+
+# Worker-process state, set once by _init_worker
+_DATASET = None
+_FOLDS = None
+
+
+class TrialPruned(Exception):
+    pass
+
+
+def month_folds(months: pd.Series, n_folds: int = 3) -> list:
+    """
+    Expanding-window time splits: validate on each of the last `n_folds`
+    months, training on every earlier month.
+    """
+    months = np.asarray(months)
+    unique = np.sort(np.unique(months))
+    if len(unique) < n_folds + 1:
+        raise ValueError(f"Need at least {n_folds + 1} months for {n_folds} folds, got {len(unique)}")
+
+    folds = []
+    for m in unique[-n_folds:]:
+        folds.append((np.flatnonzero(months < m), np.flatnonzero(months == m)))
+    return folds
+
+
+def sample_params(rng: np.random.Generator) -> dict:
+    return {
+        "learning_rate": float(np.exp(rng.uniform(np.log(0.01), np.log(0.1)))),
+        "num_leaves": int(rng.integers(15, 128)),
+        "max_depth": int(rng.integers(4, 11)),
+        "min_data_in_leaf": int(rng.integers(20, 201)),
+        "feature_fraction": float(rng.uniform(0.5, 1.0)),
+        "bagging_fraction": float(rng.uniform(0.5, 1.0)),
+        "lambda_l1": float(np.exp(rng.uniform(np.log(1e-3), np.log(10)))),
+        "lambda_l2": float(np.exp(rng.uniform(np.log(1e-3), np.log(10)))),
+    }
+
+
+def _pruning_callback(history: dict, trace: dict, period: int, min_trials: int):
+    """
+    Median pruning: stop a trial whose mean fold AUC at a checkpoint is
+    below the median of finished trials at the same checkpoint.
+    """
+    def _callback(env):
+        step = env.iteration + 1
+        if step % period:
+            return
+        score = env.evaluation_result_list[0][2]
+        trace[step] = score
+        peers = history.get(step, [])
+        if len(peers) >= min_trials and score < np.median(peers):
+            raise TrialPruned()
+    return _callback
+
+
+def _init_worker(binary_path: str, folds: list):
+    global _DATASET, _FOLDS
+    _DATASET = lgb.Dataset(binary_path, params=DATASET_PARAMS).construct()
+    _FOLDS = folds
+
+
+def _run_trial(trial: int, sampled: dict, base: dict, history: dict,
+               num_boost_round: int, period: int, min_trials: int) -> dict:
+    trace = {}
+    result = {"trial": trial, "params": sampled, "trace": trace}
+    try:
+        cv = lgb.cv(
+            dict(base, **sampled),
+            _DATASET,
+            folds=_FOLDS,
+            num_boost_round=num_boost_round,
+            callbacks=[
+                _pruning_callback(history, trace, period, min_trials),
+                lgb.early_stopping(stopping_rounds=100, verbose=False),
+            ]
+        )
+    except TrialPruned:
+        result.update(pruned=True, auc=None, num_boost_round=None)
+        return result
+
+    scores = cv["valid auc-mean"]
+    result.update(
+        pruned=False,
+        auc=float(scores[-1]),
+        num_boost_round=len(scores),
+    )
+    return result
+
+
+def run_search(df: pd.DataFrame, n_trials: int = 40, n_workers: int = None, n_folds: int = 3,
+               num_boost_round: int = 5000, period: int = 100, min_trials: int = 5,
+               output_path: str = BEST_PARAMS_PATH, seed: int = RANDOM_STATE) -> dict:
+    """
+    Random search with median pruning over month-based folds.
+
+    The training frame is binned once into a LightGBM binary file that every
+    worker loads at startup; folds are index subsets of that dataset, so no
+    trial re-bins the data. Trials run `n_workers` at a time, each pinned to
+    its share of the cores.
+    """
+    n_workers = n_workers or os.cpu_count()
+    threads = max(1, os.cpu_count() // n_workers)
+    rng = np.random.default_rng(seed)
+
+    df = cast_categorical(add_interaction_features(df))
+    y = df[TARGET]
+    folds = month_folds(df["month"], n_folds)
+    valid_months = np.sort(np.unique(np.asarray(df["month"])))[-n_folds:]
+
+    base = get_lgbm_params((y == 0).sum() / (y == 1).sum())
+    base.update(num_threads=threads, seed=seed)
+
+    history = {}
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        binary_path = os.path.join(tmp, "train.bin")
+        lgb.Dataset(
+            df[FEATURES], y,
+            categorical_feature=CAT_COLS,
+            params=DATASET_PARAMS
+        ).save_binary(binary_path)
+        del df
+
+        with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(binary_path, folds)) as pool:
+            pending = set()
+            submitted = 0
+
+            while submitted < n_trials or pending:
+                while submitted < n_trials and len(pending) < n_workers:
+                    pending.add(pool.submit(
+                        _run_trial, submitted, sample_params(rng), base, history,
+                        num_boost_round, period, min_trials
+                    ))
+                    submitted += 1
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    results.append(result)
+                    if not result["pruned"]:
+                        for step, score in result["trace"].items():
+                            history.setdefault(step, []).append(score)
+
+    finished = [r for r in results if not r["pruned"]]
+    if not finished:
+        raise RuntimeError("Every trial was pruned")
+    best = max(finished, key=lambda r: r["auc"])
+
+    summary = {
+        "params": best["params"],
+        "num_boost_round": best["num_boost_round"],
+        "cv_auc": round(best["auc"], 5),
+        "n_trials": len(results),
+        "n_pruned": len(results) - len(finished),
+        "valid_months": [int(m) for m in valid_months],
+    }
+
+    with open(output_path, "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def load_tuned_params(path: str = BEST_PARAMS_PATH):
+    """
+    Tuned booster params and round count written by run_search, or None.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    data = pd.read_csv(DATA_PATH)
+    summary = run_search(data[data["month"] <= TRAIN_MAX_MONTH])
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,124 @@
+# src/whatif.py
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    FEATURES,
+    BIN_COLS,
+    CAT_COLS,
+    FRAUD_THRESHOLD,
+    WHATIF_MAX_POINTS,
+    WHATIF_DEFAULT_STEPS,
+)
+from src.features import INTERACTION_FEATURES
+from src.inference import default_model, predict_batch
+
+# Interaction features follow the raw fields they are derived from
+SWEEPABLE = [f for f in FEATURES if f not in INTERACTION_FEATURES]
+
+
+def sweep_size(sweep: dict, categories: list) -> int:
+    """
+    How many values `sweep` covers, checked before any are generated.
+    """
+    feature = sweep["feature"]
+    if feature not in SWEEPABLE:
+        raise ValueError(f"Feature cannot be swept: {feature}")
+
+    if sweep.get("values"):
+        return len(sweep["values"])
+    if feature in BIN_COLS:
+        return 2
+    if feature in CAT_COLS:
+        return len(categories[CAT_COLS.index(feature)])
+    if sweep.get("min") is None or sweep.get("max") is None:
+        raise ValueError(f"Sweep of {feature} needs values or min and max")
+
+    steps = WHATIF_DEFAULT_STEPS if sweep.get("steps") is None else sweep["steps"]
+    if not 2 <= steps <= WHATIF_MAX_POINTS:
+        raise ValueError(f"Sweep of {feature} needs 2 to {WHATIF_MAX_POINTS} steps")
+    return steps
+
+
+def sweep_values(sweep: dict, categories: list) -> list:
+    """
+    The values of one sweep: explicit `values`, or `steps` evenly spaced
+    numbers from `min` to `max`. Categorical features without values sweep
+    every category the model was trained with, binary flags sweep 0 and 1.
+    Explicit values must all have the feature's type (0 or 1 for flags).
+    """
+    feature = sweep["feature"]
+    steps = sweep_size(sweep, categories)
+
+    if sweep.get("values"):
+        values = list(sweep["values"])
+        if feature in BIN_COLS:
+            if any(v not in (0, 1) for v in values):
+                raise ValueError(f"{feature} is a 0/1 flag")
+            return [int(v) for v in values]
+        text = feature in CAT_COLS and isinstance(categories[CAT_COLS.index(feature)][0], str)
+        if any(isinstance(v, str) != text for v in values):
+            raise ValueError(f"Values of {feature} must all be {'strings' if text else 'numbers'}")
+        return values
+    if feature in BIN_COLS:
+        return [0, 1]
+    if feature in CAT_COLS:
+        return list(categories[CAT_COLS.index(feature)])
+    return np.linspace(sweep["min"], sweep["max"], steps).round(6).tolist()
+
+
+def sweep_grid(transaction: dict, features: list, values: list,
+               max_points: int = WHATIF_MAX_POINTS) -> pd.DataFrame:
+    """
+    Raw transactions for every combination of the swept values, the first
+    feature varying slowest; all other fields come from `transaction`.
+    """
+    points = int(np.prod([len(v) for v in values]))
+    if points > max_points:
+        raise ValueError(f"Sweep has {points} points, the limit is {max_points}")
+
+    grid = pd.DataFrame([transaction] * points)
+    for feature, column in zip(features, np.meshgrid(*values, indexing="ij")):
+        grid[feature] = column.ravel()
+    return grid
+
+
+def whatif(transaction: dict, sweeps: list, served=None) -> dict:
+    """
+    Score surface of `transaction` over one or two swept features.
+
+    The grid goes through feature engineering and the full ensemble as one
+    batch, so a sweep costs one model call instead of a request per point.
+    Scores are a list over the first feature, or a matrix indexed
+    [first][second].
+    """
+    start_time = time.time()
+    served = served or default_model
+
+    if not 1 <= len(sweeps) <= 2:
+        raise ValueError("Sweep one or two features")
+    features = [s["feature"] for s in sweeps]
+    if len(set(features)) != len(features):
+        raise ValueError("Swept features must differ")
+
+    categories = served.model.pandas_categorical
+    points = int(np.prod([sweep_size(s, categories) for s in sweeps]))
+    if points > WHATIF_MAX_POINTS:
+        raise ValueError(f"Sweep has {points} points, the limit is {WHATIF_MAX_POINTS}")
+
+    values = [sweep_values(s, categories) for s in sweeps]
+    grid = sweep_grid(transaction, features, values)
+    scores = np.asarray(predict_batch(grid, served)).reshape([len(v) for v in values]).round(4)
+
+    return {
+        "model_version": served.version,
+        "threshold": FRAUD_THRESHOLD,
+        "features": features,
+        "values": values,
+        "scores": scores.tolist(),
+        "points": len(grid),
+        "latency_ms": round((time.time() - start_time) * 1000, 2),
+    }
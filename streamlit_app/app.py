@@ -1,3 +1,5 @@
+import json
+import os
 import streamlit as st
 import requests
 import pandas as pd
@@ -9,7 +11,15 @@ import time
 import random
 
 # API Configuration
-API_URL = "http://127.0.0.1:8000/predict"
+API_BASE_URL = "http://127.0.0.1:8000"
+API_URL = f"{API_BASE_URL}/predict"
+HEATMAP_URL = f"{API_BASE_URL}/heatmap"
+DRIFT_URL = f"{API_BASE_URL}/drift"
+WHATIF_URL = f"{API_BASE_URL}/whatif"
+REVIEW_URL = f"{API_BASE_URL}/review"
+
+# Offline evaluation report written by `make evaluate`
+EVALUATION_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "lgb_modified_evaluation.json")
 
 # Page Configuration
 st.set_page_config(
@@ -109,6 +119,48 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Aggregates computed by the API from scored traffic
+@st.cache_data(ttl=10, show_spinner=False)
+def fetch_heatmap():
+    """Fetch the hour x amount fraud grid, or None when the API is unreachable"""
+    try:
+        response = requests.get(HEATMAP_URL, timeout=2)
+        if response.status_code == 200:
+            return response.json()
+    except requests.RequestException:
+        pass
+    return None
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_drift():
+    """Fetch the live PSI drift report, or None when the API is unreachable"""
+    try:
+        response = requests.get(DRIFT_URL, timeout=2)
+        if response.status_code == 200:
+            return response.json()
+    except requests.RequestException:
+        pass
+    return None
+
+@st.cache_data(ttl=5, show_spinner=False)
+def fetch_review_queue(k=10):
+    """Fetch the riskiest unreviewed transactions, or None when the API is unreachable"""
+    try:
+        response = requests.get(REVIEW_URL, params={"k": k}, timeout=2)
+        if response.status_code == 200:
+            return response.json()
+    except requests.RequestException:
+        pass
+    return None
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_evaluation():
+    """Load the offline evaluation report, or None when it has not been generated"""
+    if not os.path.exists(EVALUATION_PATH):
+        return None
+    with open(EVALUATION_PATH) as f:
+        return json.load(f)
+
 # Helper function to update metrics based on transaction history
 def update_metrics_from_transactions():
     """Calculate metrics dynamically from transaction history"""
@@ -158,6 +210,8 @@ if "live_monitoring" not in st.session_state:
     st.session_state.live_monitoring = False
 if "transaction_history" not in st.session_state:
     st.session_state.transaction_history = []
+if "last_transaction" not in st.session_state:
+    st.session_state.last_transaction = None
 if "metrics" not in st.session_state:
     st.session_state.metrics = {
         "total_transactions": 12847,
@@ -285,35 +339,30 @@ with tab1:
     with col_heat1:
         st.markdown("### 🌡️ Fraud Heatmap: Time vs Amount")
 
-        # Generate synthetic heatmap data
-        np.random.seed(42)
+        heatmap = fetch_heatmap()
         hours = list(range(24))
-        amount_ranges = ['$0-500', '$500-1K', '$1K-2K', '$2K-5K', '$5K-10K', '$10K+']
-
-        # Create heatmap data with fraud clustering patterns
-        heatmap_data = []
-        for hour in hours:
-            for amount_idx, amount_range in enumerate(amount_ranges):
-                # Higher fraud in late hours and higher amounts
-                base_fraud = 5
-                time_factor = 1.5 if (hour >= 22 or hour <= 4) else 1.0
-                amount_factor = 1.0 + (amount_idx * 0.3)
-
-                fraud_count = int(base_fraud * time_factor * amount_factor *
-                                np.random.uniform(0.5, 1.5))
-
-                heatmap_data.append({
-                    'Hour': hour,
-                    'Amount Range': amount_range,
-                    'Fraud Count': fraud_count
-                })
+        amount_ranges = ['$190-500', '$500-1,000', '$1,000-1,500', '$1,500-2,000', '$2,000+']
+
+        heatmap_metric = st.radio(
+            "Show",
+            ["Fraud Count", "Fraud Rate"],
+            horizontal=True,
+            key="heatmap_metric",
+            label_visibility="collapsed"
+        )
 
-        df_heatmap = pd.DataFrame(heatmap_data)
-        pivot_heatmap = df_heatmap.pivot(index='Amount Range', columns='Hour', values='Fraud Count')
+        if heatmap is None:
+            grid = np.zeros((len(amount_ranges), len(hours)))
+            st.caption("API unreachable: no scored traffic to display")
+        else:
+            amount_ranges = heatmap['amount_ranges']
+            values = heatmap['fraud_counts'] if heatmap_metric == "Fraud Count" else heatmap['fraud_rates']
+            grid = np.array(values)
+            st.caption(f"Built from {heatmap['total']:,} transactions scored by the API")
 
         fig_heatmap = px.imshow(
-            pivot_heatmap,
-            labels=dict(x="Hour of Day", y="Transaction Amount", color="Fraud Count"),
+            grid,
+            labels=dict(x="Hour of Day", y="Transaction Amount", color=heatmap_metric),
             x=[f"{h:02d}:00" for h in hours],
             y=amount_ranges,
             color_continuous_scale='Reds',
@@ -358,6 +407,41 @@ with tab1:
 
     st.markdown("---")
 
+    # Riskiest unreviewed transactions, held by the API's review queue
+    st.markdown("### 🚨 Review Queue")
+    review_queue = fetch_review_queue()
+    if review_queue is None:
+        st.info("💡 Review queue unavailable. Start the API with `make run_api` to work the riskiest transactions first")
+    elif not review_queue["items"]:
+        st.success("✅ No transactions awaiting review")
+    else:
+        st.caption(f"{review_queue['pending']} awaiting review, riskiest first "
+                   f"(expire after {review_queue['ttl_seconds'] / 3600:.0f}h)")
+        for item in review_queue["items"]:
+            txn = item["transaction"]
+            col_q1, col_q2, col_q3, col_q4, col_q5 = st.columns([1, 2, 2, 2, 1])
+
+            with col_q1:
+                st.markdown(f"**#{item['review_id']}**")
+
+            with col_q2:
+                st.markdown(f"${txn['proposed_credit_limit']:,.0f} · {txn['payment_type']} · {txn['source']}")
+
+            with col_q3:
+                st.markdown(item["queued_at"].replace("T", " ")[:19])
+
+            with col_q4:
+                risk_color = "🔴" if item['fraud_flag'] else "🟡" if item['risk_score'] >= 0.5 else "🟢"
+                st.markdown(f"{risk_color} {item['risk_score']:.2%}")
+
+            with col_q5:
+                if st.button("✔️ Done", key=f"ack_{item['review_id']}"):
+                    requests.post(f"{REVIEW_URL}/{item['review_id']}/acknowledge", timeout=2)
+                    fetch_review_queue.clear()
+                    st.rerun()
+
+    st.markdown("---")
+
     # Live Monitoring Simulation
     st.markdown("### 🔴 Live Transaction Feed")
 
@@ -574,6 +658,7 @@ with tab2:
             "device_os": device_os,
             "month": month,
         }
+        st.session_state.last_transaction = payload
 
         with st.spinner("🔄 Calling fraud detection API..."):
             try:
@@ -642,6 +727,7 @@ with tab2:
                         st.metric("Fraud Risk", f"{score:.1%}")
                         st.metric("Threshold", f"{fraud_threshold:.1%}")
                         st.metric("API Latency", f"{latency} ms")
+                        st.caption(f"Decided by: {result.get('stage', 'full')} ensemble")
 
                     # Mock SHAP values for this transaction
                     st.markdown("---")
@@ -699,6 +785,97 @@ with tab2:
                 st.error(f"❌ Connection error: {str(e)}")
                 st.info("💡 Make sure the FastAPI server is running: `make run-api`")
 
+    # What-if sweeps of the last analyzed transaction, scored as one batch by the API
+    if st.session_state.last_transaction is not None:
+        st.markdown("---")
+        st.markdown("### 🔀 What-if Sensitivity")
+        st.caption("Sweep one or two fields of the last analyzed transaction; every other field is kept")
+
+        categorical_fields = ["employment_status", "housing_status", "payment_type", "source", "device_os", "month"]
+        # 0/1 flags are swept over their two values, not a continuous range
+        binary_fields = ["email_is_free", "phone_home_valid", "phone_mobile_valid",
+                         "has_other_cards", "foreign_request", "keep_alive_session"]
+        numeric_fields = [k for k, v in st.session_state.last_transaction.items()
+                          if isinstance(v, (int, float)) and k != "month" and k not in binary_fields]
+
+        def sweep_input(label, key, fields):
+            feature = st.selectbox(label, fields, key=f"{key}_feature")
+            if feature in categorical_fields:
+                return {"feature": feature}
+            if feature in binary_fields:
+                return {"feature": feature, "values": [0, 1]}
+            base = float(st.session_state.last_transaction[feature])
+            low, high = st.slider(
+                "Range", value=(min(0.0, base), max(2 * base, 1.0)), min_value=min(0.0, 2 * base),
+                max_value=max(4 * base, 10.0),
+                key=f"{key}_range"
+            )
+            return {"feature": feature, "min": low, "max": high}
+
+        col_wi1, col_wi2 = st.columns(2)
+        with col_wi1:
+            sweeps = [sweep_input("Sweep", "whatif_x", numeric_fields + binary_fields + categorical_fields)]
+        with col_wi2:
+            second = st.selectbox(
+                "Against", ["(none)"] + numeric_fields + binary_fields + categorical_fields, key="whatif_y"
+            )
+            if second != "(none)" and second != sweeps[0]["feature"]:
+                if second in categorical_fields:
+                    sweeps.append({"feature": second})
+                elif second in binary_fields:
+                    sweeps.append({"feature": second, "values": [0, 1]})
+                else:
+                    base = float(st.session_state.last_transaction[second])
+                    sweeps.append({"feature": second, "min": min(0.0, base), "max": max(2 * base, 1.0)})
+        steps = 25 if len(sweeps) == 1 else 15
+        for sweep in sweeps:
+            if "min" in sweep:
+                sweep["steps"] = steps
+
+        if st.button("📈 Run What-if", use_container_width=True):
+            try:
+                response = requests.post(
+                    WHATIF_URL, json={"transaction": st.session_state.last_transaction, "sweeps": sweeps}
+                )
+                if response.status_code == 200:
+                    surface = response.json()
+                    threshold = surface["threshold"]
+
+                    if len(surface["features"]) == 1:
+                        fig_whatif = go.Figure(go.Scatter(
+                            x=surface["values"][0], y=surface["scores"], mode="lines+markers",
+                            line=dict(color="#1f77b4", width=3), name="Risk score"
+                        ))
+                        fig_whatif.add_hline(y=threshold, line_dash="dash", line_color="red",
+                                             annotation_text="Fraud threshold")
+                        fig_whatif.update_layout(
+                            xaxis_title=surface["features"][0], yaxis_title="Risk Score",
+                            yaxis_range=[0, 1], height=400
+                        )
+                    else:
+                        fig_whatif = go.Figure(go.Heatmap(
+                            z=surface["scores"], y=surface["values"][0], x=surface["values"][1],
+                            colorscale="RdYlGn_r", zmin=0, zmax=1, colorbar=dict(title="Risk")
+                        ))
+                        fig_whatif.add_trace(go.Contour(
+                            z=surface["scores"], y=surface["values"][0], x=surface["values"][1],
+                            contours=dict(start=threshold, end=threshold, coloring="none", showlabels=True),
+                            line=dict(color="black", width=2), showscale=False, name="Fraud threshold"
+                        ))
+                        fig_whatif.update_layout(
+                            xaxis_title=surface["features"][1], yaxis_title=surface["features"][0], height=500
+                        )
+
+                    st.plotly_chart(fig_whatif, use_container_width=True)
+                    st.caption(f"{surface['points']} points scored in one call, {surface['latency_ms']} ms "
+                               f"(model {surface['model_version']})")
+                else:
+                    st.error(f"❌ API error {response.status_code}")
+                    st.code(response.text)
+
+            except Exception as e:
+                st.error(f"❌ Connection error: {str(e)}")
+
 # ====================================
 # TAB 3: MODEL PERFORMANCE
 # ====================================
@@ -706,14 +883,27 @@ with tab3:
     st.markdown("## 🎯 Model Performance & Explainability")
     st.markdown("Understanding model behavior and performance metrics")
 
+    evaluation = load_evaluation()
+    if evaluation is None:
+        st.info("💡 Showing illustrative figures. Run `make evaluate` to load metrics for the validation months")
+    else:
+        st.caption(f"Validation months, model {evaluation['model_version']}, evaluated {evaluation['generated_at']} "
+                   f"(threshold {evaluation['threshold']}, {evaluation['n_bootstrap']} bootstrap resamples)")
+
     col_perf1, col_perf2 = st.columns(2)
 
     with col_perf1:
         st.markdown("### 📈 ROC Curve")
 
-        # Generate mock ROC curve
-        fpr = np.linspace(0, 1, 100)
-        tpr = np.power(fpr, 0.3)  # Mock curve with AUC ~0.89
+        if evaluation is not None:
+            fpr, tpr = evaluation['roc']['fpr'], evaluation['roc']['tpr']
+            auc, auc_low, auc_high = evaluation['overall']['auc']
+            roc_label = f'LightGBM (AUC = {auc:.3f}, 95% CI {auc_low:.3f}-{auc_high:.3f})'
+        else:
+            # Generate mock ROC curve
+            fpr = np.linspace(0, 1, 100)
+            tpr = np.power(fpr, 0.3)  # Mock curve with AUC ~0.89
+            roc_label = 'LightGBM (AUC = 0.89)'
 
         fig_roc = go.Figure()
 
@@ -721,7 +911,7 @@ with tab3:
             x=fpr,
             y=tpr,
             mode='lines',
-            name=f'LightGBM (AUC = 0.89)',
+            name=roc_label,
             line=dict(color='#003d82', width=3)
         ))
 
@@ -745,10 +935,13 @@ with tab3:
     with col_perf2:
         st.markdown("### 📊 Precision-Recall Curve")
 
-        # Generate mock PR curve
-        recall = np.linspace(0, 1, 100)
-        precision = 1 - np.power(recall, 0.5) + 0.3
-        precision = np.clip(precision, 0, 1)
+        if evaluation is not None:
+            recall, precision = evaluation['pr']['recall'], evaluation['pr']['precision']
+        else:
+            # Generate mock PR curve
+            recall = np.linspace(0, 1, 100)
+            precision = 1 - np.power(recall, 0.5) + 0.3
+            precision = np.clip(precision, 0, 1)
 
         fig_pr = go.Figure()
 
@@ -778,7 +971,10 @@ with tab3:
     with col_conf1:
         st.markdown("### 🎯 Confusion Matrix")
 
-        conf_matrix = np.array([[10234, 145], [16, 967]])
+        if evaluation is not None:
+            conf_matrix = np.array(evaluation['confusion'])
+        else:
+            conf_matrix = np.array([[10234, 145], [16, 967]])
 
         fig_conf = px.imshow(
             conf_matrix,
@@ -852,6 +1048,64 @@ with tab3:
 
     st.markdown("---")
 
+    # Per-month and per-segment metrics with bootstrap intervals
+    if evaluation is not None:
+        st.markdown("### 📅 Metrics by Month & Segment")
+        st.markdown(f"Point estimates with 95% bootstrap intervals; recall@FPR at {evaluation['fpr_target']:.0%} FPR")
+
+        metric_names = {'recall': 'Recall', 'fpr': 'FPR', 'precision': 'Precision',
+                        'auc': 'AUC', 'recall_at_fpr': 'Recall@FPR'}
+
+        def metric_table(rows, label):
+            return pd.DataFrame([{
+                label: r['value'],
+                'Rows': r['rows'],
+                'Frauds': r['frauds'],
+                **{name: f"{r[m][0]:.3f} ({r[m][1]:.3f}-{r[m][2]:.3f})" for m, name in metric_names.items()}
+            } for r in rows])
+
+        col_month1, col_month2 = st.columns([1, 1])
+
+        with col_month1:
+            months = evaluation['by_month']
+            fig_month = go.Figure()
+            for m, color in (('recall', '#003d82'), ('recall_at_fpr', '#00a3e0')):
+                fig_month.add_trace(go.Scatter(
+                    x=[r['value'] for r in months],
+                    y=[r[m][0] for r in months],
+                    error_y=dict(
+                        type='data',
+                        symmetric=False,
+                        array=[r[m][2] - r[m][0] for r in months],
+                        arrayminus=[r[m][0] - r[m][1] for r in months]
+                    ),
+                    mode='lines+markers',
+                    name=metric_names[m],
+                    line=dict(color=color, width=3)
+                ))
+            fig_month.update_layout(
+                xaxis_title="Month",
+                yaxis_title="Score",
+                yaxis=dict(range=[0, 1]),
+                height=350
+            )
+            st.plotly_chart(fig_month, use_container_width=True)
+
+        with col_month2:
+            st.dataframe(metric_table(months, 'Month'), use_container_width=True, hide_index=True)
+
+        segment = st.selectbox(
+            "Segment",
+            sorted({r['group'] for r in evaluation['by_segment']})
+        )
+        st.dataframe(
+            metric_table([r for r in evaluation['by_segment'] if r['group'] == segment], segment),
+            use_container_width=True,
+            hide_index=True
+        )
+
+        st.markdown("---")
+
     # Global SHAP Feature Importance
     st.markdown("### 🎯 Global Feature Importance (SHAP)")
     st.markdown("Understanding which features matter most across all transactions")
@@ -890,6 +1144,54 @@ with tab3:
 
     st.markdown("---")
 
+    # Live drift monitoring
+    st.markdown("### 📡 Live Drift Monitor (PSI)")
+    st.markdown("Population stability of live traffic against the training months")
+
+    drift = fetch_drift()
+
+    if drift is None:
+        st.info("💡 Drift monitoring needs the FastAPI server: `make run_api`")
+    elif drift['status'] == "stopped":
+        st.warning(f"⚠️ {drift.get('detail', 'Drift worker stopped')}")
+    elif drift['status'] != "ok":
+        st.info(f"ℹ️ {drift.get('detail', drift['status'])}")
+    elif drift['observed'] == 0:
+        st.info("ℹ️ No scored traffic yet")
+    else:
+        col_drift1, col_drift2, col_drift3 = st.columns(3)
+        with col_drift1:
+            st.metric("Observed Transactions", f"{drift['observed']:,}")
+        with col_drift2:
+            st.metric("Score PSI", f"{drift['score']['psi']:.3f}", delta=drift['score']['status'],
+                      delta_color="off")
+        with col_drift3:
+            alerts = sum(1 for f in drift['features'] if f['status'] == "alert")
+            st.metric("Features Drifting", alerts)
+
+        df_drift = pd.DataFrame(drift['features'][:15])
+        drift_colors = {'stable': '#00c853', 'warn': '#ff9800', 'alert': '#d32f2f'}
+
+        fig_drift = go.Figure(go.Bar(
+            x=df_drift['psi'],
+            y=df_drift['feature'],
+            orientation='h',
+            marker=dict(color=[drift_colors[s] for s in df_drift['status']]),
+            text=[f"{v:.3f}" for v in df_drift['psi']],
+            textposition='auto'
+        ))
+
+        fig_drift.update_layout(
+            xaxis_title="PSI",
+            yaxis=dict(autorange="reversed"),
+            height=450,
+            showlegend=False
+        )
+
+        st.plotly_chart(fig_drift, use_container_width=True)
+
+    st.markdown("---")
+
     # Model Information
     col_info1, col_info2, col_info3 = st.columns(3)
 
@@ -903,23 +1205,30 @@ with tab3:
         - **Training Samples**: 245,847
         """)
 
+    if evaluation is not None:
+        auc_text = f"{evaluation['overall']['auc'][0]:.3f}"
+        recall_text = f"{evaluation['overall']['recall'][0]:.1%}"
+        fpr_text = f"{evaluation['overall']['fpr'][0]:.1%}"
+    else:
+        auc_text, recall_text, fpr_text = "0.891", "98.4%", "1.4%"
+
     with col_info2:
         st.markdown("### ⚡ Performance")
-        st.markdown("""
+        st.markdown(f"""
         - **Inference Time**: ~12ms
         - **Throughput**: 80 req/sec
-        - **AUC-ROC**: 0.891
-        - **F1-Score**: 0.925 ⭐
-        - **Recall (Fraud Caught)**: 98.4% ⭐
+        - **AUC-ROC**: {auc_text}
+        - **F1-Score**: {f1:.3f} ⭐
+        - **Recall (Fraud Caught)**: {recall_text} ⭐
 
         *⭐ Key metrics for fraud detection*
         """)
 
     with col_info3:
         st.markdown("### 🎯 Business Impact")
-        st.markdown("""
-        - **Fraud Prevention**: 98.4%
-        - **False Positive Rate**: 1.4%
+        st.markdown(f"""
+        - **Fraud Prevention**: {recall_text}
+        - **False Positive Rate**: {fpr_text}
         - **Estimated Savings**: $2.8M
         - **Review Reduction**: 42%
         """)
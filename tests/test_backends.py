@@ -0,0 +1,83 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backends import (
+    BackendRouter,
+    LightGBMBackend,
+    OnnxBackend,
+    check_parity,
+    export_onnx,
+    onnx_model_path,
+    onnxruntime,
+)
+from src.config import DATA_PATH, FEATURES, MODEL_PATH, RANDOM_STATE, TRAIN_MAX_MONTH
+
+
+class ConstantBackend:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def predict(self, X, **options):
+        return np.full(len(X), self.value)
+
+
+def test_router_routes_by_batch_size():
+    backends = {"small": ConstantBackend("small", 0.1), "large": ConstantBackend("large", 0.9)}
+    plan = [{"max_rows": 8, "backend": "small"}, {"max_rows": None, "backend": "large"}]
+    router = BackendRouter(backends, plan)
+
+    assert router.predict(pd.DataFrame({"x": range(8)}))[0] == 0.1
+    assert router.predict(pd.DataFrame({"x": range(9)}))[0] == 0.9
+    assert router.report()["calls"] == {"small": 1, "large": 1}
+
+
+def test_router_counts_concurrent_calls():
+    router = BackendRouter({"only": ConstantBackend("only", 0.5)}, [{"max_rows": None, "backend": "only"}])
+    X = pd.DataFrame({"x": [1]})
+
+    def score():
+        for _ in range(2000):
+            router.predict(X)
+
+    threads = [threading.Thread(target=score) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert router.report()["calls"]["only"] == 16000
+
+
+@pytest.fixture(scope="module")
+def validation_sample():
+    if not (os.path.exists(MODEL_PATH) and os.path.exists(DATA_PATH)):
+        pytest.skip("needs the trained model and raw_data/Base.csv")
+    from src.features import add_interaction_features
+    from src.model import load_model
+    from src.preprocessing import cast_categorical
+
+    model = load_model(MODEL_PATH)
+    data = pd.read_csv(DATA_PATH)
+    valid = data[data["month"] > TRAIN_MAX_MONTH]
+    valid = valid.sample(n=min(20000, len(valid)), random_state=RANDOM_STATE)
+    valid = cast_categorical(add_interaction_features(valid), model.pandas_categorical)
+    return model, valid[FEATURES]
+
+
+@pytest.mark.skipif(onnxruntime is None, reason="needs onnxruntime")
+def test_onnx_parity(validation_sample, tmp_path):
+    model, X = validation_sample
+    path = onnx_model_path(MODEL_PATH)
+    if not os.path.exists(path):
+        pytest.importorskip("onnxmltools")
+        path = str(tmp_path / "model.onnx")
+        export_onnx(model, path)
+
+    onnx = OnnxBackend(path, model.pandas_categorical)
+    parity = check_parity(LightGBMBackend(model).predict(X), onnx, X)
+    assert parity["flag_changes"] == 0
+    assert parity["passed"], parity
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config import BIN_COLS, CAT_COLS, FEATURES, NUM_COLS, PSI_ALERT, PSI_WARN
+from src.drift import DriftMonitor, build_reference_profile, psi, _status
+from src.features import INTERACTION_FEATURES, add_interaction_features
+
+RAW_NUMERIC = [c for c in NUM_COLS if c not in INTERACTION_FEATURES]
+
+
+def test_psi_of_identical_distributions_is_zero():
+    assert psi([0.2, 0.3, 0.5], [0.2, 0.3, 0.5]) == 0.0
+
+
+def test_psi_matches_definition():
+    expected = np.array([0.25, 0.25, 0.5])
+    actual = np.array([0.1, 0.4, 0.5])
+    assert psi(expected, actual) == pytest.approx(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def test_psi_is_symmetric_and_finite_with_empty_bins():
+    value = psi([0.5, 0.5, 0.0], [0.0, 0.5, 0.5])
+    assert np.isfinite(value) and value > 0
+    assert value == pytest.approx(psi([0.0, 0.5, 0.5], [0.5, 0.5, 0.0]))
+
+
+def test_psi_status_thresholds():
+    assert _status(PSI_WARN / 2) == "stable"
+    assert _status(PSI_WARN) == "warn"
+    assert _status(PSI_ALERT) == "alert"
+
+
+def transactions(n: int, month: int, seed: int = 0, income_shift: float = 0.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({c: rng.random(n) * 100 + 1 for c in RAW_NUMERIC})
+    df["income"] += income_shift
+    for c in BIN_COLS:
+        df[c] = rng.integers(0, 2, n)
+    for c in CAT_COLS:
+        df[c] = rng.choice(["AA", "AB", "AC"], n)
+    df["month"] = month
+    return df
+
+
+@pytest.fixture
+def profile():
+    reference = add_interaction_features(transactions(5000, month=3))
+    scores = np.random.default_rng(1).random(5000)
+    return build_reference_profile(reference, scores)
+
+
+def test_profile_leaves_out_month(profile):
+    assert "month" not in profile["categorical"]
+    monitored = set(profile["numeric"]) | set(profile["categorical"])
+    assert monitored == set(FEATURES) - {"month"}
+
+
+def test_matching_traffic_is_stable_in_a_later_month(profile):
+    monitor = DriftMonitor(profile)
+    monitor.update(transactions(5000, month=9, seed=2), np.random.default_rng(3).random(5000))
+
+    report = monitor.report()
+    assert report["observed"] == 5000
+    assert report["score"]["status"] == "stable"
+    assert all(f["status"] == "stable" for f in report["features"])
+
+
+def test_shifted_feature_alerts(profile):
+    monitor = DriftMonitor(profile)
+    monitor.update(transactions(2000, month=3, seed=2, income_shift=80), np.full(2000, 0.5))
+
+    worst = monitor.report()["features"][0]
+    assert (worst["feature"], worst["status"]) == ("income", "alert")
+
+
+def test_rows_without_a_score_are_rescored(profile):
+    rescored = []
+
+    def rescore(df):
+        rescored.append(len(df))
+        return np.full(len(df), 0.95)
+
+    monitor = DriftMonitor(profile, rescore=rescore)
+    monitor.update(transactions(4, month=7), [0.1, None, None, 0.2])
+    assert rescored == [2]
+    # The two rescored rows land in the top score bin
+    assert monitor._score[-1] == 2 and monitor._score.sum() == 4
+
+
+def test_rows_without_a_score_are_dropped_without_rescore(profile):
+    monitor = DriftMonitor(profile)
+    monitor.update(transactions(4, month=7), [0.1, None, None, 0.2])
+    assert monitor.observed == 4 and monitor._score.sum() == 2
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from sklearn.metrics import precision_score, recall_score, roc_auc_score
+
+from src.evaluation import metrics_from_counts, score_cells
+
+
+@pytest.fixture
+def labelled_scores():
+    rng = np.random.default_rng(0)
+    y = (rng.random(20000) < 0.05).astype(int)
+    # Mid-bucket on the 1e-4 grid, so bucketing loses nothing and sklearn sees the same ties
+    scores = (np.floor(np.clip(rng.normal(0.3 + 0.4 * y, 0.2), 0, 0.9999) * 1e4) + 0.5) / 1e4
+    return y, scores
+
+
+def counts(y, scores, threshold):
+    levels, idx, labels, cell_counts = score_cells(y, scores, threshold)
+    pos = np.zeros((1, len(levels)))
+    neg = np.zeros((1, len(levels)))
+    pos[0, idx[labels == 1]] = cell_counts[labels == 1]
+    neg[0, idx[labels == 0]] = cell_counts[labels == 0]
+    return pos, neg, levels
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.75])
+def test_metrics_from_counts_match_sklearn(labelled_scores, threshold):
+    y, scores = labelled_scores
+    metrics = metrics_from_counts(*counts(y, scores, threshold), threshold, fpr_target=0.05)
+
+    flags = (scores >= threshold).astype(int)
+    assert metrics["auc"][0] == pytest.approx(roc_auc_score(y, scores))
+    assert metrics["recall"][0] == pytest.approx(recall_score(y, flags))
+    assert metrics["precision"][0] == pytest.approx(precision_score(y, flags))
+    assert metrics["fpr"][0] == pytest.approx(flags[y == 0].mean())
+
+
+def test_recall_at_fpr_is_best_recall_within_target(labelled_scores):
+    y, scores = labelled_scores
+    metrics = metrics_from_counts(*counts(y, scores, 0.75), 0.75, fpr_target=0.05)
+
+    best = max(
+        (scores[y == 1] >= t).mean()
+        for t in np.unique(scores)
+        if (scores[y == 0] >= t).mean() <= 0.05
+    )
+    assert metrics["recall_at_fpr"][0] == pytest.approx(best)
+
+
+def test_unrounded_scores_keep_flags_exact():
+    rng = np.random.default_rng(1)
+    y = (rng.random(5000) < 0.1).astype(int)
+    scores = rng.random(5000)
+    threshold = 0.75003
+
+    metrics = metrics_from_counts(*counts(y, scores, threshold), threshold, fpr_target=0.05)
+    flags = (scores >= threshold).astype(int)
+    assert metrics["recall"][0] == pytest.approx(recall_score(y, flags))
+    assert metrics["fpr"][0] == pytest.approx(flags[y == 0].mean())
@@ -0,0 +1,60 @@
+import random
+import time
+
+import pytest
+
+from src.review import IndexedHeap, ReviewQueue
+
+
+def test_indexed_heap_pops_in_order_after_removals():
+    rng = random.Random(0)
+    heap, keys = IndexedHeap(), {}
+    for i in range(500):
+        keys[i] = rng.random()
+        heap.push(i, keys[i])
+    for i in rng.sample(range(500), 200):
+        heap.remove(i)
+        del keys[i]
+
+    popped = [heap.pop() for _ in range(len(heap))]
+    assert popped == sorted((k, i) for i, k in keys.items())
+
+
+def test_indexed_heap_remove_unknown_raises():
+    heap = IndexedHeap()
+    heap.push("a", 1.0)
+    with pytest.raises(KeyError):
+        heap.remove("b")
+    assert "a" in heap and len(heap) == 1
+
+
+def result(score):
+    return {"risk_score": score, "model_version": "test", "fraud_flag": int(score >= 0.75)}
+
+
+def test_review_queue_keeps_riskiest_at_capacity():
+    queue = ReviewQueue(capacity=3, ttl_seconds=3600)
+    ids = [queue.add({"n": i}, result(score)) for i, score in enumerate([0.5, 0.9, 0.7, 0.8])]
+    assert queue.add({"n": 4}, result(0.1)) is None
+
+    top = queue.top(10)
+    assert [item["risk_score"] for item in top] == [0.9, 0.8, 0.7]
+    assert ids[0] not in {item["review_id"] for item in top}
+    assert (queue.evicted, queue.skipped) == (1, 1)
+
+
+def test_review_queue_expires_and_acknowledges():
+    queue = ReviewQueue(capacity=10, ttl_seconds=60)
+    now = time.time()
+    queue.add({"n": 0}, result(0.9), timestamp=now - 120)
+    kept = queue.add({"n": 1}, result(0.8), timestamp=now)
+    other = queue.add({"n": 2}, result(0.7), timestamp=now)
+
+    assert [item["review_id"] for item in queue.top(10)] == [kept, other]
+    assert queue.acknowledge(kept)["transaction"] == {"n": 1}
+    with pytest.raises(KeyError):
+        queue.acknowledge(kept)
+
+    report = queue.report()
+    assert (report["pending"], report["expired"], report["acknowledged"]) == (1, 1, 1)
+    assert report["lowest_held_score"] == 0.7
@@ -0,0 +1,64 @@
+import time
+
+from src.rings import RingIndex
+
+
+def test_shared_identifiers_form_one_ring():
+    index = RingIndex(ttl_seconds=3600, max_applications=100)
+    index.add({"device_id": "d1", "email": "a@x.com"}, fraud=True)
+    index.add({"device_id": "d2", "email": "A@x.com "}, fraud=False)
+    index.add({"device_id": "d2", "phone": "555"}, fraud=False)
+    index.add({"device_id": "d9"}, fraud=False)
+
+    assert index.lookup({"phone": "555"}) == {"ring_size": 3, "ring_fraud_rate": 0.3333}
+    assert index.lookup({"device_id": "d9", "email": "a@x.com"})["ring_size"] == 4
+    assert index.lookup({"device_id": "unseen"}) == {"ring_size": 0, "ring_fraud_rate": None}
+    assert index.report()["rings"] == 2
+
+
+def test_expired_applications_leave_their_ring():
+    index = RingIndex(ttl_seconds=60, max_applications=100, compact_fraction=1e9)
+    now = time.time()
+    index.add({"device_id": "d1"}, fraud=True, timestamp=now - 120)
+    index.add({"device_id": "d1"}, fraud=False, timestamp=now)
+    index.add({"device_id": "d1"}, fraud=False, timestamp=now)
+
+    assert index.lookup({"device_id": "d1"}) == {"ring_size": 2, "ring_fraud_rate": 0.0}
+    assert (index.expired, index.report()["tombstones"]) == (1, 1)
+
+
+def test_max_applications_evicts_the_oldest():
+    index = RingIndex(ttl_seconds=3600, max_applications=2, compact_fraction=1e9)
+    for device in ("d1", "d2", "d3"):
+        index.add({"device_id": device}, fraud=False)
+
+    assert index.lookup({"device_id": "d1"})["ring_size"] == 0
+    assert index.lookup({"device_id": "d3"})["ring_size"] == 1
+    assert index.evicted == 1
+
+
+def test_compaction_splits_rings_joined_only_by_expired_applications():
+    index = RingIndex(ttl_seconds=60, max_applications=100, compact_fraction=1e9)
+    now = time.time()
+    index.add({"device_id": "d1", "phone": "1"}, fraud=True, timestamp=now - 120)
+    index.add({"device_id": "d1"}, fraud=False, timestamp=now)
+    index.add({"phone": "1"}, fraud=True, timestamp=now)
+
+    # The expired application still links both through its tombstone
+    assert index.lookup({"device_id": "d1"})["ring_size"] == 2
+    index.compact()
+    assert index.lookup({"device_id": "d1"}) == {"ring_size": 1, "ring_fraud_rate": 0.0}
+    assert index.lookup({"phone": "1"}) == {"ring_size": 1, "ring_fraud_rate": 1.0}
+    assert index.report()["tombstones"] == 0
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "rings.json.gz")
+    index = RingIndex(ttl_seconds=3600, max_applications=100)
+    index.add({"email": "a@x.com"}, fraud=True)
+    index.add({"email": "a@x.com", "phone": "2"}, fraud=False)
+    index.save(path)
+
+    restored = RingIndex(ttl_seconds=3600, max_applications=100).load(path)
+    assert restored.lookup({"phone": "2"}) == index.lookup({"phone": "2"}) == {"ring_size": 2, "ring_fraud_rate": 0.5}
+    assert restored.add({"email": "b@x.com"}, fraud=False) == 2
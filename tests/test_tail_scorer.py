@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+from src.config import MODEL_PATH
+
+if not os.path.exists(MODEL_PATH):
+    pytest.skip("needs the trained model", allow_module_level=True)
+
+import api.tail_scorer as tail_scorer
+from api.tail_scorer import TailScorer
+
+SAMPLE = {
+    "income": 0.3, "customer_age": 40, "credit_risk_score": 150,
+    "proposed_credit_limit": 1500.0, "intended_balcon_amount": 10.0,
+    "session_length_in_minutes": 5.0, "days_since_request": 0.5,
+    "bank_months_count": 10, "zip_count_4w": 1000,
+    "velocity_6h": 4000.0, "velocity_24h": 4000.0, "velocity_4w": 4500.0,
+    "bank_branch_count_8w": 10, "device_distinct_emails_8w": 1,
+    "date_of_birth_distinct_emails_4w": 5,
+    "prev_address_months_count": -1, "current_address_months_count": 50,
+    "email_is_free": 1, "phone_home_valid": 0, "phone_mobile_valid": 1,
+    "has_other_cards": 0, "foreign_request": 1, "keep_alive_session": 0,
+    "employment_status": "CA", "housing_status": "BC", "payment_type": "AB",
+    "source": "INTERNET", "device_os": "windows", "month": 7,
+}
+
+
+class ListSink:
+    def __init__(self):
+        self.records = []
+
+    def record(self, transaction, result):
+        self.records.append((transaction, result))
+
+
+def scorer(tmp_path, source, sink):
+    return TailScorer(
+        [str(source)], str(tmp_path / "out.ndjson"), str(tmp_path / "checkpoint.json"),
+        metrics_path=None, audit_sink=sink
+    ).recover()
+
+
+def output(tmp_path) -> list:
+    with open(tmp_path / "out.ndjson") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_scores_complete_lines_and_reports_bad_ones(tmp_path):
+    source = tmp_path / "in.ndjson"
+    source.write_text(json.dumps(SAMPLE) + "\nnot json\n" + json.dumps({"income": 0.1}) + "\n" + json.dumps(SAMPLE))
+    sink = ListSink()
+
+    assert scorer(tmp_path, source, sink).step() == 3
+    entries = output(tmp_path)
+    assert "risk_score" in entries[0]
+    assert entries[1]["error"] == "Invalid JSON object"
+    assert entries[2]["error"].startswith("Missing fields")
+    assert len(sink.records) == 1
+
+
+def test_crash_before_checkpoint_scores_and_audits_each_line_once(tmp_path, monkeypatch):
+    source = tmp_path / "in.ndjson"
+    source.write_text((json.dumps(SAMPLE) + "\n") * 5)
+    sink = ListSink()
+
+    def crash(path, data):
+        raise OSError("crashed before the checkpoint")
+
+    monkeypatch.setattr(tail_scorer, "write_atomic", crash)
+    with pytest.raises(OSError):
+        scorer(tmp_path, source, sink).step()
+    assert len(output(tmp_path)) == 5 and not sink.records
+    monkeypatch.undo()
+
+    recovered = scorer(tmp_path, source, sink)
+    assert recovered.step() == 5
+    assert recovered.step() == 0
+    entries = output(tmp_path)
+    assert [e["offset"] for e in entries] == [i * len(json.dumps(SAMPLE) + "\n") for i in range(5)]
+    assert len(sink.records) == 5
+
+
+def test_resumes_from_checkpoint(tmp_path):
+    source = tmp_path / "in.ndjson"
+    source.write_text((json.dumps(SAMPLE) + "\n") * 2)
+    sink = ListSink()
+    scorer(tmp_path, source, sink).step()
+
+    with open(source, "a") as f:
+        f.write(json.dumps(SAMPLE) + "\n")
+    assert scorer(tmp_path, source, sink).step() == 1
+    assert len(output(tmp_path)) == 3